@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: organização serial vs. AsyncFileOrganizer com latência injetada
+
+Simula uma montagem remota acrescentando um atraso fixo a cada chamada de sistema
+usada no caminho crítico (stat, open, rename, listdir, mkdir...) e compara o caminho
+serial (workers = 1), o pool de threads (workers = N) e o núcleo assíncrono.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from organizador_arquivos import FileOrganizer
+
+PATCHED = ("stat", "lstat", "open", "close", "replace", "rename", "listdir", "mkdir", "unlink", "remove")
+EXTENSIONS = (".pdf", ".jpg", ".mp3", ".mp4", ".zip", ".py", ".txt", ".xyz")
+
+
+class InjectedLatency:
+    """Acrescenta `latency` segundos a cada chamada das funções de os em PATCHED"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self._originals = {}
+
+    def __enter__(self):
+        for name in PATCHED:
+            original = self._originals[name] = getattr(os, name)
+
+            def delayed(*args, _original=original, **kwargs):
+                time.sleep(self.latency)
+                return _original(*args, **kwargs)
+
+            setattr(os, name, delayed)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+
+def make_tree(base, count):
+    folder = os.path.join(base, "tree")
+    os.makedirs(folder)
+    for i in range(count):
+        with open(os.path.join(folder, f"arquivo_{i:06d}{EXTENSIONS[i % len(EXTENSIONS)]}"), "wb") as f:
+            f.write(b"x")
+    return folder
+
+
+def new_organizer(base, workers):
+    organizer = FileOrganizer(os.path.join(base, "organizer_config.json"))
+    organizer.config["workers"] = workers
+    organizer.config["journal_enabled"] = False
+    return organizer
+
+
+def run(label, count, latency, organize):
+    base = tempfile.mkdtemp(prefix="bench_async_", dir=os.environ.get("BENCH_DIR"))
+    try:
+        folder = make_tree(base, count)
+        with InjectedLatency(latency):
+            start = time.perf_counter()
+            success, summary = organize(base, folder)
+            elapsed = time.perf_counter() - start
+        assert f"{count} arquivos organizados" in summary, summary
+        print(f"{label:<28} {count:>6} arquivos  {elapsed:8.3f}s  {count / elapsed:>9,.0f} arquivos/s")
+        return elapsed
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="atraso por chamada de sistema")
+    parser.add_argument("--workers", type=int, default=8, help="workers do pool de threads")
+    parser.add_argument("--async-workers", type=int, default=32)
+    parser.add_argument("--per-directory", type=int, default=4)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    print(f"Latência injetada: {args.latency_ms} ms por chamada ({', '.join(PATCHED)})")
+
+    def serial(base, folder):
+        return new_organizer(base, 1).organize_folder(folder)
+
+    def threads(base, folder):
+        return new_organizer(base, args.workers).organize_folder(folder)
+
+    def asynchronous(base, folder):
+        organizer = new_organizer(base, 1)
+        organizer.config["async_workers"] = args.async_workers
+        organizer.config["async_per_directory"] = args.per_directory
+        async_organizer = organizer.get_async()
+        try:
+            return async_organizer.run(async_organizer.organize_folder(folder))
+        finally:
+            async_organizer.stop()
+
+    baseline = run("serial (workers = 1)", args.files, latency, serial)
+    pooled = run(f"threads (workers = {args.workers})", args.files, latency, threads)
+    overlapped = run(f"async ({args.async_workers} workers)", args.files, latency, asynchronous)
+    print(f"\nGanho sobre o serial: threads {baseline / pooled:.1f}x, async {baseline / overlapped:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
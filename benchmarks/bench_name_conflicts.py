@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resolução de conflitos de nome com cache por pasta vs. laço de os.path.exists
+Move N arquivos com o mesmo nome (scan.pdf) para a mesma pasta de destino
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from organizador_arquivos import FileOrganizer
+
+
+def make_sources(base, count, filename):
+    """Cria count arquivos com o mesmo nome, cada um em sua própria pasta"""
+    paths = []
+    for i in range(count):
+        folder = os.path.join(base, f"{i:06d}")
+        os.makedirs(folder)
+        path = os.path.join(folder, filename)
+        with open(path, 'w') as f:
+            f.write("x")
+        paths.append(path)
+    return paths
+
+
+def legacy_move(file_path, target_dir):
+    """Implementação original: um os.path.exists por sufixo já usado"""
+    filename = os.path.basename(file_path)
+    target_path = os.path.join(target_dir, filename)
+    counter = 1
+    while os.path.exists(target_path):
+        name, ext = os.path.splitext(filename)
+        target_path = os.path.join(target_dir, f"{name}_{counter}{ext}")
+        counter += 1
+    shutil.move(file_path, target_path)
+
+
+def run(label, count, move):
+    base = tempfile.mkdtemp(prefix="bench_conflicts_", dir=os.environ.get("BENCH_DIR"))
+    try:
+        sources = make_sources(os.path.join(base, "src"), count, "scan.pdf")
+        target_dir = os.path.join(base, "dest")
+        os.makedirs(target_dir)
+        start = time.perf_counter()
+        for path in sources:
+            move(path, target_dir)
+        elapsed = time.perf_counter() - start
+        assert len(os.listdir(target_dir)) == count
+        print(f"{label:<22} {count:>7} arquivos  {elapsed:8.3f}s  {count / elapsed:>10,.0f} arquivos/s")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10000, help="arquivos com o mesmo nome")
+    parser.add_argument("--legacy-files", type=int, default=2000,
+                        help="arquivos para o laço original (custo O(n²))")
+    args = parser.parse_args()
+
+    organizer = FileOrganizer()
+
+    def cached_move(file_path, target_dir):
+        target_path = organizer.name_cache.claim(target_dir, os.path.basename(file_path))
+        shutil.move(file_path, target_path)
+
+    run("laço os.path.exists", args.legacy_files, legacy_move)
+    run("cache por pasta", args.legacy_files, cached_move)
+    organizer.name_cache.clear()
+    run("cache por pasta", args.files, cached_move)
+
+
+if __name__ == "__main__":
+    main()
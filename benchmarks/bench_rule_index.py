@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: índice de regras pré-compilado vs. busca linear
+Compara get_file_category com a varredura original regra a regra
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from organizador_arquivos import FileOrganizer
+
+
+def linear_category(rules, file_path):
+    """Implementação original: O(regras × extensões) por arquivo"""
+    extension = Path(file_path).suffix.lower()
+    for category, rule in rules.items():
+        if extension in rule["extensions"]:
+            return category, rule["folder"]
+    return "outros", "📁 Outros"
+
+
+def build_rules(organizer, extra_rules):
+    """Adiciona regras sintéticas às regras padrão"""
+    rules = dict(organizer.default_config["rules"])
+    for i in range(extra_rules):
+        rules[f"custom_{i}"] = {
+            "extensions": [f".c{i}x{j}" for j in range(8)],
+            "folder": f"Custom {i}"
+        }
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200000, help="nomes classificados")
+    parser.add_argument("--rules", type=int, default=300, help="regras extras sintéticas")
+    args = parser.parse_args()
+
+    organizer = FileOrganizer()
+    organizer.config = dict(organizer.config)
+    organizer.config["rules"] = build_rules(organizer, args.rules)
+    organizer.rebuild_rule_index()
+
+    extensions = [ext for rule in organizer.config["rules"].values() for ext in rule["extensions"]]
+    extensions += [".xyz", ".unknown", ""]
+    rng = random.Random(42)
+    names = [f"arquivo_{i}{rng.choice(extensions)}" for i in range(args.files)]
+
+    start = time.perf_counter()
+    for name in names:
+        linear_category(organizer.config["rules"], name)
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in names:
+        organizer.get_file_category(name)
+    index_time = time.perf_counter() - start
+
+    print(f"regras: {len(organizer.config['rules'])}  arquivos: {args.files}")
+    print(f"busca linear:  {linear_time:.3f}s ({args.files / linear_time:,.0f} arquivos/s)")
+    print(f"índice:        {index_time:.3f}s ({args.files / index_time:,.0f} arquivos/s)")
+    print(f"speedup:       {linear_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
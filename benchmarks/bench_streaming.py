@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memória de pico e tempo até o primeiro movimento em pastas planas grandes
+
+Organiza uma pasta com N arquivos no modo streaming (scan_chunk_size > 0, o máximo de
+arquivos em andamento) e com a listagem completa (scan_chunk_size = 0), medindo com tracemalloc o pico de memória
+alocada pelo Python e o tempo até o primeiro arquivo movido. Falha se o pico do modo
+streaming passar do teto (--max-peak-mb), que não depende do número de arquivos.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from organizador_arquivos import FileOrganizer
+
+EXTENSIONS = (".pdf", ".jpg", ".mp3", ".mp4", ".zip", ".py", ".txt", ".xyz")
+
+
+def make_tree(base, count):
+    folder = os.path.join(base, "tree")
+    os.makedirs(folder)
+    for i in range(count):
+        with open(os.path.join(folder, f"arquivo_{i:08d}{EXTENSIONS[i % len(EXTENSIONS)]}"), "wb"):
+            pass
+    return folder
+
+
+def run(label, count, chunk_size, workers):
+    base = tempfile.mkdtemp(prefix="bench_streaming_", dir=os.environ.get("BENCH_DIR"))
+    try:
+        folder = make_tree(base, count)
+        organizer = FileOrganizer(os.path.join(base, "organizer_config.json"))
+        organizer.config["journal_enabled"] = False
+        organizer.config["workers"] = workers
+        organizer.config["scan_chunk_size"] = chunk_size
+        first_move = []
+
+        def log(message):
+            if not first_move and message.startswith("✅"):
+                first_move.append(time.perf_counter())
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        success, summary = organizer.organize_folder(folder, log)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert f"{count} arquivos organizados" in summary, summary
+        first = (first_move[0] - start) * 1000 if first_move else float("nan")
+        print(f"{label:<24} {count:>9} arquivos  pico {peak / 2**20:8.2f} MB  "
+              f"primeiro movimento {first:9.1f} ms  total {elapsed:7.2f}s")
+        return peak
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-peak-mb", type=float, default=32.0, help="teto de memória do modo streaming")
+    parser.add_argument("--skip-full", action="store_true", help="não mede o modo com a listagem completa")
+    args = parser.parse_args()
+
+    ceiling = args.max_peak_mb * 2**20
+    for count in args.files:
+        peak = run(f"streaming ({args.chunk_size} em andamento)", count, args.chunk_size, args.workers)
+        if not args.skip_full:
+            run("listagem completa", count, 0, args.workers)
+        assert peak <= ceiling, f"pico de {peak / 2**20:.2f} MB acima do teto de {args.max_peak_mb} MB"
+    print(f"\nModo streaming dentro do teto de {args.max_peak_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
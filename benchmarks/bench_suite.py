@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmark/carga do FileOrganizer em árvores sintéticas
+
+Gera pastas em tmpfs (/dev/shm quando existe, ou BENCH_DIR) com quantidade de arquivos,
+mistura de extensões, distribuição de tamanhos e taxa de colisão de nomes configuráveis,
+e mede para cada cenário:
+
+- arquivos/s
+- chamadas de sistema por arquivo (contadores sobre as funções de os/open)
+- pico de memória (RSS) do processo que executou o cenário (a árvore é gerada em outro processo)
+- latência ponta a ponta do monitoramento (arquivo criado → arquivo movido)
+
+Cada cenário roda em um processo próprio, para que o pico de RSS e os caches sejam
+isolados. O resultado é um JSON com o commit atual; --compare imprime a variação em
+relação a um resultado anterior.
+
+Exemplos:
+    python benchmarks/bench_suite.py --files 20000 --output resultados/$(git rev-parse --short HEAD).json
+    python benchmarks/bench_suite.py --compare resultados/antes.json --output resultados/depois.json
+"""
+
+import argparse
+import builtins
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from organizador_arquivos import FileOrganizer, FolderMonitor, WATCHDOG_AVAILABLE
+
+SCENARIOS = ("organize_folder", "organize_file", "watcher")
+
+# Funções contadas como chamadas de sistema (as que o organizador usa no caminho crítico);
+# "open" é o open() embutido e "os_open" é os.open (reserva de nomes com O_EXCL, leitura de cabeçalhos);
+# "entry_stat" é o primeiro DirEntry.stat() de cada entrada (os seguintes vêm do cache do DirEntry)
+SYSCALLS = ("stat", "lstat", "scandir", "entry_stat", "listdir", "open", "os_open", "close", "mkdir",
+            "makedirs", "rename", "replace", "link", "unlink", "remove", "utime", "copy_file_range",
+            "sendfile", "pread")
+
+
+def parse_mix(text):
+    """Converte "pdf=40,jpg=30,xyz=5" em [(".pdf", 40), (".jpg", 30), (".xyz", 5)]"""
+    mix = []
+    for item in text.split(","):
+        ext, _, weight = item.partition("=")
+        ext = ext.strip()
+        mix.append(("." + ext.lstrip(".") if ext else "", float(weight or 1)))
+    return mix
+
+
+def default_bench_dir():
+    return os.environ.get("BENCH_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+def file_size(rng, min_size, max_size):
+    """Tamanho com distribuição log-uniforme entre min_size e max_size"""
+    if max_size <= min_size:
+        return min_size
+    low = max(1, min_size)
+    size = int(low * (max_size / low) ** rng.random())
+    return 0 if min_size == 0 and rng.random() < 0.01 else size
+
+
+def make_tree(base, params, organizer, count=None):
+    """Cria a árvore sintética e devolve (pasta, lista de arquivos, bytes totais)
+
+    Uma fração collision_rate dos arquivos recebe um nome que já existe na pasta de
+    destino correspondente, forçando a resolução de conflitos.
+    """
+    rng = random.Random(params["seed"])
+    count = params["files"] if count is None else count
+    folder = os.path.join(base, "tree")
+    os.makedirs(folder)
+    extensions, weights = zip(*params["mix"])
+    buffer = os.urandom(params["max_size"]) if params["max_size"] else b""
+
+    paths = []
+    total = 0
+    for i in range(count):
+        ext = rng.choices(extensions, weights)[0]
+        name = f"arquivo_{i:07d}{ext}"
+        if rng.random() < params["collision_rate"]:
+            # O mesmo nome já está no destino
+            path = os.path.join(folder, name)
+            _, target_dir = organizer.resolve_target_dir(path, os.stat(folder), folder)
+            os.makedirs(target_dir, exist_ok=True)
+            open(os.path.join(target_dir, name), "wb").close()
+        size = file_size(rng, params["min_size"], params["max_size"])
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(buffer[:size])
+        paths.append(path)
+        total += size
+    return folder, paths, total
+
+
+def build_tree(base, params, count=None):
+    """Executa make_tree em um processo à parte, para que a geração não entre no pico de RSS"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_make_tree_child, (base, params, count))
+
+
+def _make_tree_child(base, params, count):
+    return make_tree(base, params, new_organizer(base, params), count)
+
+
+class CountedDirEntry:
+    """DirEntry que conta o stat() que vai ao disco
+
+    os.DirEntry não aceita atributos novos, então os.scandir passa a devolver este
+    invólucro; o resto dos atributos e métodos vem da entrada original.
+    """
+
+    __slots__ = ("_entry", "_counts", "_stated")
+
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+        self._stated = set()
+
+    def stat(self, *, follow_symlinks=True):
+        if follow_symlinks not in self._stated:
+            self._stated.add(follow_symlinks)
+            self._counts["entry_stat"] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def __fspath__(self):
+        return self._entry.path
+
+    def __repr__(self):
+        return repr(self._entry)
+
+
+class CountedScandir:
+    """Iterador de os.scandir que embrulha cada entrada em CountedDirEntry"""
+
+    def __init__(self, iterator, counts):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return CountedDirEntry(next(self._iterator), self._counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+class SyscallCounter:
+    """Substitui funções de os e open por versões que contam as chamadas"""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(SYSCALLS, 0)
+        self._originals = []
+
+    def _wrap(self, owner, name, key):
+        original = getattr(owner, name)
+        counts = self.counts
+
+        @functools.wraps(original)
+        def counted(*args, **kwargs):
+            counts[key] += 1
+            return original(*args, **kwargs)
+
+        self._originals.append((owner, name, original))
+        setattr(owner, name, counted)
+
+    def __enter__(self):
+        for name in SYSCALLS:
+            if name == "open":
+                self._wrap(builtins, "open", "open")
+            elif name == "os_open":
+                self._wrap(os, "open", "os_open")
+            elif name == "scandir":
+                self._wrap_scandir()
+            elif hasattr(os, name):
+                self._wrap(os, name, name)
+        return self
+
+    def _wrap_scandir(self):
+        original = os.scandir
+        counts = self.counts
+
+        @functools.wraps(original)
+        def counted(*args, **kwargs):
+            counts["scandir"] += 1
+            return CountedScandir(original(*args, **kwargs), counts)
+
+        self._originals.append((os, "scandir", original))
+        os.scandir = counted
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+
+
+def new_organizer(base, params):
+    organizer = FileOrganizer(os.path.join(base, "organizer_config.json"))
+    organizer.config["workers"] = params["workers"]
+    organizer.config["journal_enabled"] = params["journal"]
+    organizer.config["journal_file"] = os.path.join(base, "organizer_journal.db")
+    organizer.config["hash_cache_file"] = os.path.join(base, "organizer_hashes.db")
+    organizer.config["watch_quiet_period"] = params["quiet_period"]
+    return organizer
+
+
+def bench_organize_folder(base, params, counter):
+    folder, paths, total = build_tree(base, params)
+    organizer = new_organizer(base, params)
+    with counter:
+        start = time.perf_counter()
+        success, summary = organizer.organize_folder(folder)
+        elapsed = time.perf_counter() - start
+    return {"files": len(paths), "bytes": total, "seconds": elapsed, "summary": summary}
+
+
+def bench_organize_file(base, params, counter):
+    folder, paths, total = build_tree(base, params)
+    organizer = new_organizer(base, params)
+    errors = 0
+    with counter:
+        start = time.perf_counter()
+        for path in paths:
+            success, _ = organizer.organize_file(path, folder)
+            errors += not success
+        elapsed = time.perf_counter() - start
+    return {"files": len(paths), "bytes": total, "seconds": elapsed, "errors": errors}
+
+
+def bench_watcher(base, params, counter):
+    """Cria arquivos em uma pasta monitorada e mede quanto tempo cada um leva para sair dela"""
+    if not WATCHDOG_AVAILABLE:
+        return {"skipped": "watchdog não instalado"}
+    organizer = new_organizer(base, params)
+    folder = os.path.join(base, "watched")
+    os.makedirs(folder)
+    count = params["watch_files"]
+    rng = random.Random(params["seed"])
+    extensions, weights = zip(*params["mix"])
+    payload = os.urandom(params["min_size"] or 1)
+
+    monitor = FolderMonitor(organizer)
+    monitor.start([folder])
+    created = {}
+    latencies = []
+    # Referências capturadas antes dos contadores: a criação e a espera não são do organizador
+    create, scandir = builtins.open, os.scandir
+    try:
+        with counter:
+            start = time.perf_counter()
+            for i in range(count):
+                name = f"arquivo_{i:07d}{rng.choices(extensions, weights)[0]}"
+                with create(os.path.join(folder, name), "wb") as f:
+                    f.write(payload)
+                created[name] = time.perf_counter()
+                if params["watch_interval"]:
+                    time.sleep(params["watch_interval"])
+            deadline = time.perf_counter() + params["watch_timeout"]
+            while created and time.perf_counter() < deadline:
+                present = {entry.name for entry in scandir(folder) if entry.is_file()}
+                now = time.perf_counter()
+                for name in [name for name in created if name not in present]:
+                    latencies.append(now - created.pop(name))
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - start
+    finally:
+        monitor.stop()
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+    return {"files": count, "seconds": elapsed, "timed_out": len(created),
+            "latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99),
+                           "max": percentile(1.0)}}
+
+
+def run_scenario(name, params):
+    """Executa um cenário neste processo e devolve o resultado"""
+    base = tempfile.mkdtemp(prefix=f"bench_{name}_", dir=params["bench_dir"])
+    cwd = os.getcwd()
+    os.chdir(base)
+    try:
+        counter = SyscallCounter() if params["count_syscalls"] else _NullCounter()
+        result = globals()[f"bench_{name}"](base, params, counter)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(base, ignore_errors=True)
+    if "skipped" in result:
+        return result
+    result["files_per_sec"] = round(result["files"] / result["seconds"], 1) if result["seconds"] else None
+    if params["count_syscalls"]:
+        counts = {key: value for key, value in counter.counts.items() if value}
+        result["syscalls"] = counts
+        result["syscalls_per_file"] = round(sum(counts.values()) / max(1, result["files"]), 2)
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_kb"] = maxrss // 1024 if sys.platform == "darwin" else maxrss
+    return result
+
+
+class _NullCounter:
+    counts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Imprime a variação das métricas principais em relação a um resultado anterior"""
+    print(f"\nComparação com {previous.get('commit', '?')[:10]}:")
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name)
+        if not before or "skipped" in result or "skipped" in before:
+            continue
+        for key in ("files_per_sec", "syscalls_per_file", "peak_rss_kb"):
+            old, new = before.get(key), result.get(key)
+            if old and new is not None:
+                print(f"  {name:<16} {key:<18} {old:>12,.1f} → {new:>12,.1f}  ({(new - old) / old:+.1%})")
+        old, new = before.get("latency_ms", {}).get("p95"), result.get("latency_ms", {}).get("p95")
+        if old and new is not None:
+            print(f"  {name:<16} {'latency_p95_ms':<18} {old:>12,.1f} → {new:>12,.1f}  ({(new - old) / old:+.1%})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="cenários separados por vírgula")
+    parser.add_argument("--files", type=int, default=10000, help="arquivos por árvore sintética")
+    parser.add_argument("--mix", default="pdf=25,jpg=25,mp4=10,mp3=10,zip=5,py=10,xyz=10,=5",
+                        help="extensões e pesos (vazio = sem extensão)")
+    parser.add_argument("--min-size", type=int, default=0, help="tamanho mínimo dos arquivos (bytes)")
+    parser.add_argument("--max-size", type=int, default=64 * 1024, help="tamanho máximo dos arquivos (bytes)")
+    parser.add_argument("--collision-rate", type=float, default=0.1,
+                        help="fração de arquivos cujo nome já existe no destino")
+    parser.add_argument("--workers", type=int, default=1, help="valor de workers na configuração")
+    parser.add_argument("--no-journal", dest="journal", action="store_false", help="desativa o diário")
+    parser.add_argument("--no-syscalls", dest="count_syscalls", action="store_false",
+                        help="não conta chamadas de sistema (evita o custo dos contadores)")
+    parser.add_argument("--watch-files", type=int, default=500, help="arquivos criados no cenário watcher")
+    parser.add_argument("--watch-interval", type=float, default=0.001, help="intervalo entre criações (s)")
+    parser.add_argument("--watch-timeout", type=float, default=60.0, help="tempo máximo de espera (s)")
+    parser.add_argument("--quiet-period", type=float, default=0.2, help="watch_quiet_period (s)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--bench-dir", default=default_bench_dir(), help="pasta base (padrão: /dev/shm)")
+    parser.add_argument("--output", help="grava o resultado em JSON neste arquivo")
+    parser.add_argument("--compare", help="resultado JSON anterior para comparação")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    params = {key: value for key, value in vars(args).items()
+              if key not in ("scenarios", "output", "compare", "scenario")}
+    params["mix"] = parse_mix(args.mix)
+
+    if args.scenario:
+        # Processo filho: executa um único cenário e devolve o resultado em stdout
+        print(json.dumps(run_scenario(args.scenario, params)))
+        return 0
+
+    results = {}
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Cenário desconhecido: {name}")
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--scenario", name]
+                               + (argv if argv is not None else sys.argv[1:]),
+                               capture_output=True, text=True)
+        if child.returncode != 0:
+            sys.stderr.write(child.stderr)
+            raise SystemExit(f"Cenário {name} falhou")
+        results[name] = json.loads(child.stdout.strip().splitlines()[-1])
+        result = results[name]
+        if "skipped" in result:
+            print(f"{name:<16} ignorado: {result['skipped']}")
+            continue
+        line = f"{name:<16} {result['files']:>7} arquivos  {result['seconds']:8.3f}s  {result['files_per_sec']:>10,.0f} arquivos/s"
+        if "syscalls_per_file" in result:
+            line += f"  {result['syscalls_per_file']:6.2f} syscalls/arquivo"
+        line += f"  RSS {result['peak_rss_kb'] / 1024:6.1f} MiB"
+        if "latency_ms" in result:
+            line += f"  latência p50/p95 {result['latency_ms']['p50']}/{result['latency_ms']['p95']} ms"
+        print(line)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado salvo em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,25 +5,1247 @@ Organiza arquivos automaticamente por tipo, data ou regras personalizadas
 """
 
 import os
+import sys
+import errno
 import json
 import shutil
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
+import stat
+import sqlite3
+import argparse
+import signal
+import importlib.util
+import queue
+import tempfile
+import csv
+import copy
+import hashlib
+import threading
+import bisect
+import re
+import functools
+import fnmatch
+import filecmp
+from collections import namedtuple
 from datetime import datetime
-from pathlib import Path
-from threading import Thread
+from threading import Thread, Lock, Event
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
 import time
 
-try:
+# watchdog e tkinter só são importados quando usados: uma varredura pela linha
+# de comando não paga o custo de nenhum dos dois
+WATCHDOG_AVAILABLE = importlib.util.find_spec("watchdog") is not None
+
+def new_observer():
+    """Cria um Observer do watchdog, importando-o sob demanda"""
     from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-    WATCHDOG_AVAILABLE = True
-except ImportError:
-    WATCHDOG_AVAILABLE = False
+    return Observer()
+
+tk = ttk = filedialog = messagebox = scrolledtext = None
+
+def _load_tkinter():
+    """Importa o tkinter sob demanda; o modo linha de comando nunca paga esse custo"""
+    global tk, ttk, filedialog, messagebox, scrolledtext
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as _ttk, filedialog as _filedialog
+        from tkinter import messagebox as _messagebox, scrolledtext as _scrolledtext
+        tk, ttk, filedialog = tkinter, _ttk, _filedialog
+        messagebox, scrolledtext = _messagebox, _scrolledtext
+
+asyncio = None
+
+def _load_asyncio():
+    """Importa o asyncio sob demanda; só o AsyncFileOrganizer o usa"""
+    global asyncio
+    if asyncio is None:
+        import asyncio as _asyncio
+        asyncio = _asyncio
+
+def stream_copy(source, target, size, buffer_size=8 * 1024 * 1024, progress=None):
+    """Copia size bytes entre arquivos abertos em modo binário, no kernel quando possível
+    
+    Tenta copy_file_range, depois sendfile e, por fim, leitura/escrita com um buffer
+    reutilizado. progress(copiados) é chamado após cada bloco. Retorna os bytes copiados.
+    """
+    source_fd, target_fd = source.fileno(), target.fileno()
+    copied = 0
+    for kernel_copy in ("copy_file_range", "sendfile"):
+        if not hasattr(os, kernel_copy):
+            continue
+        try:
+            while copied < size:
+                if kernel_copy == "copy_file_range":
+                    sent = os.copy_file_range(source_fd, target_fd, min(buffer_size, size - copied))
+                else:
+                    sent = os.sendfile(target_fd, source_fd, copied, min(buffer_size, size - copied))
+                if sent == 0:
+                    return copied
+                copied += sent
+                if progress:
+                    progress(copied)
+            return copied
+        except OSError as e:
+            # Sem suporte para este par de sistemas de arquivos: tenta o próximo método
+            if copied or e.errno not in (errno.EXDEV, errno.EINVAL, errno.ENOSYS,
+                                         errno.EOPNOTSUPP, errno.EPERM, errno.EBADF):
+                raise
+    
+    view = memoryview(bytearray(buffer_size))
+    while True:
+        read = source.readinto(view)
+        if not read:
+            return copied
+        target.write(view[:read])
+        copied += read
+        if progress:
+            progress(copied)
+
+# os.link sobre um link simbólico deve vincular o próprio link, não o arquivo apontado
+_LINK_OPTIONS = {"follow_symlinks": False} if os.link in os.supports_follow_symlinks else {}
+
+class TargetNameCache:
+    """Cache em memória dos nomes ocupados em cada pasta de destino
+    
+    Cada pasta é listada uma única vez; depois disso os conflitos de nome são
+    resolvidos em memória, com um contador do próximo sufixo livre por nome base.
+    O nome escolhido é criado com O_EXCL, o que protege contra arquivos criados
+    por outros processos depois da listagem.
+    
+    Para a memória não crescer com o tamanho da varredura, claim() guarda no máximo
+    max_names nomes; ao passar disso a pasta deixa o cache e seus conflitos passam a
+    ser resolvidos direto no disco, tentando O_EXCL com o contador de sufixos. Uma
+    pasta que já não cabe no limite nem chega a ser listada por inteiro.
+    """
+    
+    def __init__(self, max_names=100000):
+        self.max_names = max_names
+        self._names = {}
+        self._counters = {}
+        self._probing = set()
+        self._tracked = 0
+        self._lock = Lock()
+    
+    def clear(self):
+        """Descarta todo o cache (ex.: no início de uma nova varredura)"""
+        with self._lock:
+            self._names.clear()
+            self._counters.clear()
+            self._probing.clear()
+            self._tracked = 0
+    
+    def _dir_names(self, target_dir, limit=None):
+        """Nomes da pasta, listada uma única vez; None se ela tiver mais de limit nomes"""
+        names = self._names.get(target_dir)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(target_dir) as entries:
+                    for entry in entries:
+                        names.add(entry.name)
+                        # Pasta grande demais para o cache: para de listar em vez de guardar tudo
+                        if limit is not None and len(names) > limit:
+                            return None
+            except FileNotFoundError:
+                pass
+            self._names[target_dir] = names
+            self._tracked += len(names)
+        return names
+    
+    def _next_candidate(self, target_dir, filename, bounded=False):
+        """Escolhe em memória o próximo nome livre e o marca como ocupado
+        
+        Retorna None se a pasta saiu do cache (bounded e limite de nomes atingido).
+        """
+        with self._lock:
+            if target_dir in self._probing:
+                return None
+            names = self._dir_names(target_dir, self.max_names - self._tracked if bounded else None)
+            if names is None:
+                self._probing.add(target_dir)
+                return None
+            # O nome original pode ter sido apagado desde a listagem
+            if filename in names and not os.path.lexists(os.path.join(target_dir, filename)):
+                names.discard(filename)
+            candidate = filename
+            if candidate in names:
+                stem, ext = os.path.splitext(filename)
+                key = (target_dir, stem, ext)
+                counter = self._counters.get(key, 1)
+                while candidate in names:
+                    candidate = f"{stem}_{counter}{ext}"
+                    counter += 1
+                self._counters[key] = counter
+            names.add(candidate)
+            self._tracked += 1
+            if bounded and self._tracked > self.max_names:
+                # Memória limitada: esta pasta passa a resolver conflitos direto no disco
+                self._tracked -= len(names)
+                del self._names[target_dir]
+                self._probing.add(target_dir)
+        return candidate
+    
+    @staticmethod
+    def create_placeholder(target_path):
+        """Reserva o nome com um arquivo vazio criado com O_EXCL"""
+        os.close(os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+    
+    def _probe(self, target_dir, filename, create):
+        """Cria o primeiro nome livre direto no disco, sem lista de nomes (pastas fora do cache)"""
+        candidate = filename
+        key = None
+        while True:
+            target_path = os.path.join(target_dir, candidate)
+            try:
+                create(target_path)
+                return target_path
+            except FileExistsError:
+                if key is None:
+                    stem, ext = os.path.splitext(filename)
+                    key = (target_dir, stem, ext)
+                with self._lock:
+                    counter = self._counters.get(key, 1)
+                    self._counters[key] = counter + 1
+                candidate = f"{stem}_{counter}{ext}"
+    
+    def forget(self, target_dir):
+        """Descarta o que se sabe de uma pasta (ex.: apagada durante a execução)"""
+        with self._lock:
+            self._probing.discard(target_dir)
+            names = self._names.pop(target_dir, None)
+            if names is not None:
+                self._tracked -= len(names)
+            for key in [key for key in self._counters if key[0] == target_dir]:
+                del self._counters[key]
+    
+    def reserve(self, target_dir, filename):
+        """Reserva um nome livre apenas em memória (simulação, sem criar o arquivo) e retorna o nome"""
+        return self._next_candidate(target_dir, filename)
+    
+    def claim(self, target_dir, filename, create=None):
+        """Reserva um nome livre em target_dir, criando-o atomicamente, e retorna o caminho
+        
+        create(caminho) cria o nome e levanta FileExistsError se ele já existir; o
+        padrão é create_placeholder. Um hard link da origem, por exemplo, reserva o
+        nome e move o arquivo de uma vez, sem deixar arquivo vazio no caminho.
+        """
+        create = create or self.create_placeholder
+        while True:
+            candidate = self._next_candidate(target_dir, filename, bounded=True)
+            if candidate is None:
+                return self._probe(target_dir, filename, create)
+            target_path = os.path.join(target_dir, candidate)
+            try:
+                create(target_path)
+                return target_path
+            except FileExistsError:
+                # Criado por fora depois da listagem: continua marcado e tenta o próximo
+                continue
+    
+    def release(self, target_path):
+        """Desfaz uma reserva cuja movimentação falhou"""
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        with self._lock:
+            names = self._names.get(os.path.dirname(target_path))
+            if names is not None:
+                names.discard(os.path.basename(target_path))
+
+class ContentSniffer:
+    """Classifica arquivos sem extensão conhecida pelos primeiros bytes (magic bytes)
+    
+    Lê apenas sniff_bytes bytes com pread e guarda o resultado por
+    (dispositivo, inode, tamanho, mtime), então varreduras repetidas não voltam a
+    ler o mesmo arquivo. As categorias são as chaves de "rules".
+    """
+    
+    # (deslocamento, assinatura, categoria); a primeira que casar vence
+    SIGNATURES = [
+        (0, b"\xff\xd8\xff", "images"),
+        (0, b"\x89PNG\r\n\x1a\n", "images"),
+        (0, b"GIF87a", "images"),
+        (0, b"GIF89a", "images"),
+        (0, b"II*\x00", "images"),
+        (0, b"MM\x00*", "images"),
+        (8, b"WEBP", "images"),
+        (0, b"%PDF-", "documents"),
+        (0, b"{\\rtf", "documents"),
+        (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "documents"),
+        (0, b"ID3", "audio"),
+        (0, b"fLaC", "audio"),
+        (0, b"OggS", "audio"),
+        (8, b"WAVE", "audio"),
+        (4, b"ftypM4A", "audio"),
+        (4, b"ftyp", "video"),
+        (0, b"\x1a\x45\xdf\xa3", "video"),
+        (8, b"AVI ", "video"),
+        (0, b"FLV\x01", "video"),
+        (0, b"Rar!\x1a\x07", "archives"),
+        (0, b"7z\xbc\xaf\x27\x1c", "archives"),
+        (0, b"\x1f\x8b", "archives"),
+        (0, b"BZh", "archives"),
+        (0, b"\xfd7zXZ\x00", "archives"),
+        (257, b"ustar", "archives"),
+        (0, b"!<arch>\ndebian", "executables"),
+        (0, b"\xed\xab\xee\xdb", "executables"),
+        (0, b"MZ", "executables"),
+        (0, b"\x7fELF", "executables"),
+        (0, b"\xcf\xfa\xed\xfe", "executables"),
+        (0, b"\xca\xfe\xba\xbe", "executables"),
+    ]
+    
+    # Documentos do Office/LibreOffice são ZIP; o conteúdo inicial os diferencia
+    ZIP_DOCUMENT_MARKERS = (b"word/", b"xl/", b"ppt/", b"mimetypeapplication/vnd.oasis")
+    
+    # Nomes da primeira entrada de um ZIP que indicam documento (o Word e o Excel
+    # gravam [Content_Types].xml primeiro, e "word/" pode ficar fora da janela lida)
+    ZIP_DOCUMENT_FIRST_ENTRIES = (b"[Content_Types].xml", b"_rels/.rels", b"mimetype")
+    
+    def __init__(self, sniff_bytes=512, max_cache=100000):
+        self.sniff_bytes = sniff_bytes
+        self.max_cache = max_cache
+        self._cache = {}
+        self._lock = Lock()
+        self.files_read = 0
+        self.bytes_read = 0
+        self.cache_hits = 0
+    
+    def classify_bytes(self, header):
+        """Retorna a categoria correspondente ao cabeçalho, ou None"""
+        if header.startswith(b"PK\x03\x04"):
+            # Cabeçalho local: tamanho do nome no deslocamento 26, nome a partir do 30
+            name_length = int.from_bytes(header[26:28], "little")
+            if header[30:30 + name_length] in self.ZIP_DOCUMENT_FIRST_ENTRIES:
+                return "documents"
+            if any(marker in header for marker in self.ZIP_DOCUMENT_MARKERS):
+                return "documents"
+            return "archives"
+        for offset, signature, category in self.SIGNATURES:
+            if header.startswith(signature, offset):
+                return category
+        return None
+    
+    def classify(self, file_path, stat_result):
+        """Retorna a categoria do arquivo pelo conteúdo, ou None se nenhuma assinatura casar"""
+        key = (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        with self._lock:
+            if key in self._cache:
+                self.cache_hits += 1
+                return self._cache[key]
+        
+        try:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return None
+        try:
+            if hasattr(os, "pread"):
+                header = os.pread(fd, self.sniff_bytes, 0)
+            else:
+                header = os.read(fd, self.sniff_bytes)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        
+        category = self.classify_bytes(header)
+        with self._lock:
+            self.files_read += 1
+            self.bytes_read += len(header)
+            if len(self._cache) >= self.max_cache:
+                # Descarta a entrada mais antiga (dict mantém a ordem de inserção)
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = category
+        return category
+
+def _partial_digest(path, size, block_size):
+    """Hash do primeiro e do último bloco do arquivo (executado no pool de processos)
+    
+    Retorna None se o arquivo não puder ser lido (ex.: removido após a listagem).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, 'rb') as f:
+            digest.update(f.read(block_size))
+            if size > block_size:
+                f.seek(max(block_size, size - block_size))
+                digest.update(f.read(block_size))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _full_digest(path, buffer_size=1024 * 1024):
+    """Hash do conteúdo completo, lido em streaming (executado no pool de processos)
+    
+    Retorna None se o arquivo não puder ser lido (ex.: removido após a listagem).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    view = memoryview(bytearray(buffer_size))
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                read = f.readinto(view)
+                if not read:
+                    return digest.hexdigest()
+                digest.update(view[:read])
+    except OSError:
+        return None
+
+class HashCache:
+    """Cache persistente (SQLite) de hashes parciais e completos por (caminho, tamanho, mtime)"""
+    
+    def __init__(self, path):
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                partial TEXT,
+                full TEXT
+            )""")
+        self._conn.commit()
+    
+    def get(self, path, size, mtime_ns):
+        """Retorna (parcial, completo) se o arquivo não mudou desde o cálculo, senão None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, partial, full FROM hashes WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == size and row[1] == mtime_ns:
+            return row[2], row[3]
+        return None
+    
+    def put_many(self, rows):
+        """Grava [(caminho, tamanho, mtime_ns, parcial, completo)] em uma única transação"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, partial, full) VALUES (?, ?, ?, ?, ?)",
+                rows)
+            self._conn.commit()
+
+class ScanIndex:
+    """Índice persistente (SQLite) das pastas varridas: mtime da pasta e estado de cada entrada
+    
+    Para cada pasta guarda o st_mtime_ns visto na última varredura, a impressão das
+    opções que decidiram o que ficou nela e as entradas que continuaram nela
+    (arquivos com tamanho, mtime e a decisão tomada; subpastas).
+    """
+    
+    def __init__(self, path):
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                decision TEXT,
+                PRIMARY KEY (dir, name)
+            ) WITHOUT ROWID;
+        """)
+        # Índices antigos não tinham a impressão das opções: essas pastas são reavaliadas
+        if "fingerprint" not in {row[1] for row in self._conn.execute("PRAGMA table_info(dirs)")}:
+            self._conn.execute("ALTER TABLE dirs ADD COLUMN fingerprint TEXT")
+        self._conn.commit()
+    
+    def directory(self, path):
+        """Retorna (varrida?, mtime_ns, impressão) da pasta; mtime_ns None obriga a listá-la de novo"""
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, fingerprint FROM dirs WHERE path = ?", (path,)).fetchone()
+        return (False, None, None) if row is None else (True, row[0], row[1])
+    
+    def entries(self, path, kind=None):
+        """Retorna {nome: (tipo, tamanho, mtime_ns, decisão)} das entradas registradas da pasta"""
+        query = "SELECT name, kind, size, mtime_ns, decision FROM entries WHERE dir = ?"
+        params = (path,)
+        if kind:
+            query += " AND kind = ?"
+            params += (kind,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {name: (kind, size, mtime_ns, decision) for name, kind, size, mtime_ns, decision in rows}
+    
+    def save(self, states, fingerprint=None):
+        """Substitui o estado das pastas [(pasta, mtime_ns ou None, [(nome, tipo, tamanho, mtime_ns, decisão)])]"""
+        with self._lock:
+            for path, mtime_ns, entries in states:
+                self._conn.execute("INSERT OR REPLACE INTO dirs (path, mtime_ns, fingerprint) VALUES (?, ?, ?)",
+                                   (path, mtime_ns, fingerprint))
+                self._conn.execute("DELETE FROM entries WHERE dir = ?", (path,))
+                self._conn.executemany(
+                    "INSERT INTO entries (dir, name, kind, size, mtime_ns, decision) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(path,) + entry for entry in entries])
+            self._conn.commit()
+
+class IncrementalScan:
+    """Uma varredura apoiada no ScanIndex
+    
+    Pastas com o mesmo mtime da última varredura não são listadas (apenas as subpastas
+    conhecidas são visitadas) e arquivos que continuaram na pasta com o mesmo tamanho e
+    mtime não são reprocessados. Com full=True tudo é listado, mas o índice é atualizado.
+    
+    fingerprint resume as opções que decidem o que fica para trás (ver
+    FileOrganizer.scan_fingerprint); pastas registradas com outra impressão são
+    tratadas como nunca varridas.
+    """
+    
+    # Um arquivo criado no mesmo "tick" de mtime que a última listagem não muda o mtime
+    # da pasta; pastas alteradas há menos que isso são listadas de novo na próxima vez
+    RACY_WINDOW_NS = 2 * 10**9
+    
+    def __init__(self, index, full=False, fingerprint=None):
+        self.index = index
+        self.full = full
+        self.fingerprint = fingerprint
+        self.listed = {}
+        self.unchanged_dirs = 0
+        self.unchanged_files = 0
+    
+    def known_state(self, directory):
+        """Retorna (pasta inalterada?, entradas conhecidas) e registra a pasta se for listada"""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return True, {}
+        scanned, known_mtime, known_fingerprint = self.index.directory(directory)
+        if known_fingerprint != self.fingerprint:
+            # As opções mudaram (ex.: ignore_hidden, dedup_action, regras): tudo é reavaliado
+            scanned = False
+        if scanned and not self.full and known_mtime == mtime_ns:
+            self.unchanged_dirs += 1
+            return True, self.index.entries(directory, "d")
+        entries = self.index.entries(directory) if scanned else {}
+        self.listed[directory] = entries
+        return False, entries
+    
+    def is_unchanged(self, entry, known):
+        """Indica se o arquivo continua como ficou na última varredura"""
+        previous = known.get(entry.name)
+        if self.full or previous is None or previous[0] != "f":
+            return False
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            return False
+        if (previous[1], previous[2]) != (stat_result.st_size, stat_result.st_mtime_ns):
+            return False
+        self.unchanged_files += 1
+        return True
+    
+    def finish(self, organizer, settled):
+        """Grava o estado das pastas listadas depois que a varredura terminou
+        
+        settled mapeia os arquivos que ficaram na pasta por decisão (ex.: duplicado
+        ignorado) para a mensagem dessa decisão. Arquivos que falharam ou que chegaram
+        durante a varredura não são registrados e deixam a pasta marcada para nova listagem.
+        """
+        ignore_hidden = organizer.config.get("ignore_hidden", True)
+        states = []
+        for directory, previous in self.listed.items():
+            rows = []
+            complete = True
+            try:
+                before = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as dir_entries:
+                    for entry in dir_entries:
+                        if entry.is_file():
+                            stat_result = entry.stat()
+                            known = previous.get(entry.name)
+                            if entry.path in settled:
+                                decision = settled[entry.path]
+                            elif ignore_hidden and entry.name.startswith('.'):
+                                decision = "Arquivo oculto ignorado"
+                            elif known and known[0] == "f" and (known[1], known[2]) == (
+                                    stat_result.st_size, stat_result.st_mtime_ns):
+                                decision = known[3]
+                            else:
+                                complete = False
+                                continue
+                            rows.append((entry.name, "f", stat_result.st_size, stat_result.st_mtime_ns, decision))
+                        elif (entry.is_dir(follow_symlinks=False)
+                                and not (ignore_hidden and entry.name.startswith('.'))
+                                and not organizer._is_managed_dir(entry.name)):
+                            rows.append((entry.name, "d", None, None, None))
+                after = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            stable = complete and before == after and time.time_ns() - after > self.RACY_WINDOW_NS
+            states.append((directory, after if stable else None, rows))
+        self.index.save(states, self.fingerprint)
+
+class DuplicateDetector:
+    """Encontra arquivos de conteúdo idêntico com o mínimo de leitura
+    
+    Agrupa primeiro por tamanho; só arquivos com tamanho repetido têm o primeiro e o
+    último bloco hasheados, e só os que também colidem nesse hash parcial são lidos
+    por completo. Os hashes são calculados em um pool de processos e guardados em
+    HashCache.
+    """
+    
+    def __init__(self, cache=None, workers=1, block_size=64 * 1024):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.block_size = block_size
+    
+    def find(self, candidates, existing=()):
+        """Retorna {caminho duplicado: original}
+        
+        candidates e existing são listas de (caminho, stat). Só candidatos são
+        marcados como duplicados; o original é, de preferência, um arquivo existente
+        e, senão, o primeiro candidato com aquele conteúdo.
+        """
+        by_size = {}
+        for path, stat_result in candidates:
+            if stat_result.st_size:
+                by_size.setdefault(stat_result.st_size, []).append((path, stat_result, True))
+        for path, stat_result in existing:
+            if stat_result.st_size in by_size:
+                by_size[stat_result.st_size].append((path, stat_result, False))
+        
+        suspects = [group for group in by_size.values() if len(group) > 1]
+        partial = self._digests([item for group in suspects for item in group], "partial")
+        
+        colliding = self._group(suspects, partial)
+        full = self._digests([item for group in colliding for item in group], "full")
+        
+        duplicates = {}
+        for group in self._group(colliding, full):
+            # Ordena existentes primeiro, mantendo a ordem de listagem dos candidatos
+            group.sort(key=lambda item: item[2])
+            original = group[0][0]
+            for path, _, is_candidate in group[1:]:
+                if is_candidate:
+                    duplicates[path] = original
+        return duplicates
+    
+    @staticmethod
+    def _group(groups, digests):
+        """Subdivide os grupos pelo hash e mantém os que têm ao menos um candidato repetido"""
+        result = []
+        for group in groups:
+            by_digest = {}
+            for item in group:
+                digest = digests.get(item[0])
+                if digest:
+                    by_digest.setdefault(digest, []).append(item)
+            result.extend(members for members in by_digest.values()
+                          if len(members) > 1 and any(item[2] for item in members))
+        return result
+    
+    def _digests(self, items, kind):
+        """Calcula (ou lê do cache) o hash parcial ou completo de cada item"""
+        digests = {}
+        missing = []
+        cached = {}
+        for path, stat_result, _ in items:
+            row = self.cache.get(path, stat_result.st_size, stat_result.st_mtime_ns) if self.cache else None
+            value = row and (row[0] if kind == "partial" else row[1])
+            cached[path] = row
+            if value:
+                digests[path] = value
+            else:
+                missing.append((path, stat_result))
+        if not missing:
+            return digests
+        
+        if kind == "partial":
+            args = ([path for path, _ in missing], [st.st_size for _, st in missing],
+                    [self.block_size] * len(missing))
+            func = _partial_digest
+        else:
+            args = ([path for path, _ in missing],)
+            func = _full_digest
+        
+        if self.workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(func, *args, chunksize=max(1, len(missing) // (self.workers * 4))))
+        else:
+            results = [func(*call_args) for call_args in zip(*args)]
+        
+        rows = []
+        for (path, stat_result), digest in zip(missing, results):
+            if digest is None:
+                continue
+            digests[path] = digest
+            previous = cached.get(path) or (None, None)
+            row = (digest, previous[1]) if kind == "partial" else (previous[0], digest)
+            rows.append((path, stat_result.st_size, stat_result.st_mtime_ns) + row)
+        if self.cache and rows:
+            self.cache.put_many(rows)
+        return digests
+
+PlanEntry = namedtuple("PlanEntry", "source target_dir final_name category size")
+
+class MovePlan:
+    """Plano de movimentações calculado sem alterar o disco
+    
+    Cada entrada informa origem, pasta de destino, nome final (já com a resolução
+    de conflitos simulada), categoria e tamanho.
+    """
+    
+    def __init__(self, folder, entries=None):
+        self.folder = folder
+        self.entries = entries if entries is not None else []
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def summary(self):
+        """Quantidade de arquivos e bytes por categoria"""
+        totals = {}
+        for entry in self.entries:
+            category = totals.setdefault(entry.category, {"files": 0, "bytes": 0})
+            category["files"] += 1
+            category["bytes"] += entry.size
+        return totals
+    
+    def to_json(self, path):
+        """Exporta o plano completo, com o resumo por categoria, em JSON"""
+        data = {
+            "folder": self.folder,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "summary": self.summary(),
+            "entries": [entry._asdict() for entry in self.entries],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    
+    def to_csv(self, path):
+        """Exporta as entradas do plano em CSV"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(PlanEntry._fields)
+            writer.writerows(self.entries)
+    
+    @classmethod
+    def from_json(cls, path):
+        """Carrega um plano exportado com to_json"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["folder"], [PlanEntry(**entry) for entry in data["entries"]])
+
+def _process_alive(pid):
+    """Indica se o processo pid ainda existe"""
+    if os.name == "nt":
+        import ctypes
+        SYNCHRONIZE, WAIT_TIMEOUT = 0x00100000, 0x00000102
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+        if not handle:
+            return False
+        try:
+            return kernel32.WaitForSingleObject(handle, 0) == WAIT_TIMEOUT
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _bounded_results(submit, items, max_pending):
+    """Gera os resultados de submit(item) conforme terminam, com no máximo max_pending em andamento
+    
+    submit retorna um concurrent.futures.Future; os itens são consumidos aos poucos.
+    """
+    pending = set()
+    for item in items:
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(submit(item))
+    for future in as_completed(pending):
+        yield future.result()
+
+class MoveJournal:
+    """Diário persistente das movimentações (SQLite em modo WAL)
+    
+    Cada varredura ou sessão de monitoramento é uma execução (run) com suas
+    movimentações (origem, destino, tamanho, mtime). A execução guarda o tipo
+    ("sweep", "watch" ou "apply") e o pid do processo dono, para que apenas
+    varreduras realmente abandonadas sejam retomadas. As gravações são confirmadas
+    em grupo a cada commit_every registros ou commit_interval segundos, sem um
+    fsync por arquivo.
+    """
+    
+    # Execuções abertas neste processo, por (banco, run_id), compartilhadas entre instâncias
+    _active = set()
+    
+    def __init__(self, path, commit_every=500, commit_interval=1.0):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._lock = Lock()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self._key = os.path.realpath(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                folder TEXT NOT NULL,
+                started REAL NOT NULL,
+                finished REAL,
+                undone REAL
+            );
+            CREATE TABLE IF NOT EXISTS moves (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                undone INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS moves_run ON moves(run_id);
+            CREATE TABLE IF NOT EXISTS intents (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                source TEXT NOT NULL,
+                target TEXT NOT NULL
+            );
+        """)
+        # Diários antigos não tinham tipo nem dono da execução
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "kind" not in columns:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN kind TEXT NOT NULL DEFAULT 'sweep'")
+        if "pid" not in columns:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN pid INTEGER")
+        self._conn.commit()
+    
+    def _orphaned(self, run_id, pid):
+        """Indica se uma execução não concluída não tem mais dono vivo"""
+        if pid == os.getpid():
+            return (self._key, run_id) not in self._active
+        return pid is None or not _process_alive(pid)
+    
+    def begin_run(self, folder, kind="sweep"):
+        """Abre uma execução para a pasta
+        
+        Uma varredura ("sweep") retoma a última varredura da pasta que foi
+        interrompida, desde que o processo dono não esteja mais rodando.
+        Monitoramento ("watch") e aplicação de plano ("apply") sempre abrem uma
+        execução nova. Retorna (run_id, retomada).
+        """
+        folder = os.path.abspath(folder)
+        with self._lock:
+            if kind == "sweep":
+                row = self._conn.execute(
+                    "SELECT id, finished, undone, pid FROM runs WHERE folder = ? AND kind = 'sweep' "
+                    "ORDER BY id DESC LIMIT 1", (folder,)).fetchone()
+                if row and row[1] is None and row[2] is None and self._orphaned(row[0], row[3]):
+                    self._conn.execute("UPDATE runs SET pid = ? WHERE id = ?", (os.getpid(), row[0]))
+                    self._conn.commit()
+                    self._active.add((self._key, row[0]))
+                    return row[0], True
+            cursor = self._conn.execute(
+                "INSERT INTO runs (folder, started, kind, pid) VALUES (?, ?, ?, ?)",
+                (folder, time.time(), kind, os.getpid()))
+            self._conn.commit()
+            self._active.add((self._key, cursor.lastrowid))
+            return cursor.lastrowid, False
+    
+    def finish_run(self, run_id):
+        """Marca a execução como concluída e grava tudo o que estiver pendente"""
+        with self._lock:
+            self._active.discard((self._key, run_id))
+            self._conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+            self._commit()
+    
+    def intend(self, run_id, source, target):
+        """Registra, antes de começar, uma movimentação que pode ser interrompida no meio
+        
+        Ao contrário de record(), grava na hora (em WAL com synchronous=NORMAL o commit
+        não faz fsync), para que uma queda do processo deixe o par (origem, destino)
+        registrado. Retorna o id da intenção, a ser passado a record().
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO intents (run_id, source, target) VALUES (?, ?, ?)", (run_id, source, target))
+            self._commit()
+            return cursor.lastrowid
+    
+    def drop_intent(self, intent_id):
+        """Descarta uma intenção que não vai virar movimentação"""
+        with self._lock:
+            self._conn.execute("DELETE FROM intents WHERE id = ?", (intent_id,))
+            self._commit()
+    
+    def stale_intents(self, folder):
+        """Intenções deixadas por execuções abandonadas da pasta: [(id, run_id, origem, destino)]"""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT intents.id, intents.run_id, intents.source, intents.target, runs.pid "
+                "FROM intents JOIN runs ON runs.id = intents.run_id "
+                "WHERE runs.folder = ? AND runs.undone IS NULL ORDER BY intents.id", (folder,)).fetchall()
+            return [(intent_id, run_id, source, target)
+                    for intent_id, run_id, source, target, pid in rows if self._orphaned(run_id, pid)]
+    
+    def record(self, run_id, source, target, size, mtime, intent_id=None):
+        """Registra uma movimentação concluída (commit em grupo), encerrando a intenção, se houver"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO moves (run_id, source, target, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                (run_id, source, target, size, mtime))
+            if intent_id is not None:
+                self._conn.execute("DELETE FROM intents WHERE id = ?", (intent_id,))
+            self._uncommitted += 1
+            if (self._uncommitted >= self.commit_every
+                    or time.monotonic() - self._last_commit >= self.commit_interval):
+                self._commit()
+    
+    def flush(self):
+        """Grava os registros pendentes"""
+        with self._lock:
+            self._commit()
+    
+    def _commit(self):
+        self._conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+    
+    def recorded_moves(self, run_id):
+        """Retorna {origem: (destino, tamanho, mtime)} das movimentações da execução"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, target, size, mtime FROM moves WHERE run_id = ? AND undone = 0",
+                (run_id,)).fetchall()
+        return {source: (target, size, mtime) for source, target, size, mtime in rows}
+    
+    def last_run(self):
+        """Retorna (id, pasta) da execução mais recente ainda não desfeita, ou None
+        
+        Execuções em andamento (varredura ou monitoramento ativos) não entram.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, folder, finished, pid FROM runs WHERE undone IS NULL ORDER BY id DESC")
+            for run_id, folder, finished, pid in rows:
+                if finished is not None or self._orphaned(run_id, pid):
+                    return run_id, folder
+        return None
+    
+    def undo_run(self, run_id, log_callback=None):
+        """Desfaz as movimentações da execução em ordem inversa
+        
+        Retorna (restaurados, erros).
+        """
+        with self._lock:
+            self._commit()
+            moves = self._conn.execute(
+                "SELECT id, source, target FROM moves WHERE run_id = ? AND undone = 0 ORDER BY id DESC",
+                (run_id,)).fetchall()
+        
+        restored = []
+        error_count = 0
+        for move_id, source, target in moves:
+            try:
+                if os.path.lexists(source):
+                    raise FileExistsError(f"{source} já existe")
+                os.makedirs(os.path.dirname(source), exist_ok=True)
+                shutil.move(target, source)
+                restored.append((move_id,))
+                if log_callback:
+                    log_callback(f"↩️ {os.path.basename(target)} → {source}")
+            except Exception as e:
+                error_count += 1
+                if log_callback:
+                    log_callback(f"❌ Erro ao restaurar {os.path.basename(target)}: {str(e)}")
+        
+        # Marca tudo de uma vez, em uma única transação
+        with self._lock:
+            self._conn.executemany("UPDATE moves SET undone = 1 WHERE id = ?", restored)
+            if not error_count:
+                self._conn.execute("UPDATE runs SET undone = ? WHERE id = ?", (time.time(), run_id))
+            self._commit()
+        return len(restored), error_count
+    
+    def close(self):
+        """Grava os pendentes e fecha o banco"""
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+class Metrics:
+    """Tempos por etapa, contadores e medidores das varreduras e do monitoramento
+    
+    Desativado (padrão), cada ponto de medição é uma chamada que retorna na primeira
+    linha. Ativado, os tempos vão para histogramas de buckets fixos, exportáveis em
+    JSON ou no formato texto do Prometheus.
+    """
+    
+    BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+    COUNTERS = ("files_moved", "files_skipped", "files_errored", "files_unchanged", "bytes_moved")
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = Lock()
+        self._gauges = {}
+        self.reset()
+    
+    def reset(self):
+        """Zera histogramas e contadores"""
+        with self._lock:
+            self._histograms = {}
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+            self._rules = {}
+    
+    def start(self):
+        """Instante inicial de uma medição (0 quando desativado)"""
+        return time.perf_counter() if self.enabled else 0.0
+    
+    def lap(self, stage, started):
+        """Registra o tempo desde started na etapa e retorna o instante atual"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.observe(stage, now - started)
+        return now
+    
+    def observe(self, stage, seconds):
+        """Registra uma duração no histograma da etapa"""
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = [[0] * (len(self.BUCKETS) + 1), 0, 0.0]
+            histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+    
+    def count(self, name, value=1):
+        """Incrementa um contador"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def rule(self, category, seconds, hit):
+        """Registra uma avaliação de regra (tempo gasto e se casou)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._rules.get(category)
+            if stats is None:
+                stats = self._rules[category] = [0, 0, 0.0]
+            stats[0] += hit
+            stats[1] += 1
+            stats[2] += seconds
+    
+    def register_gauge(self, name, func):
+        """Registra um medidor lido no momento do snapshot (ex.: profundidade da fila)"""
+        self._gauges[name] = func
+    
+    def unregister_gauge(self, name):
+        self._gauges.pop(name, None)
+    
+    def _quantile(self, buckets, count, q):
+        """Limite superior do bucket que contém o quantil q"""
+        threshold = q * count
+        cumulative = 0
+        for bound, hits in zip(self.BUCKETS, buckets):
+            cumulative += hits
+            if cumulative >= threshold:
+                return bound
+        return None
+    
+    def snapshot(self):
+        """Estado atual como dicionário serializável em JSON"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {stage: (list(h[0]), h[1], h[2]) for stage, h in self._histograms.items()}
+            rules = {category: {"hits": hits, "evaluations": evaluations, "seconds": seconds}
+                     for category, (hits, evaluations, seconds) in sorted(self._rules.items())}
+        gauges = {}
+        for name, func in list(self._gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception:
+                gauges[name] = None
+        
+        stages = {}
+        for stage, (buckets, count, total) in sorted(histograms.items()):
+            cumulative = 0
+            by_bound = {}
+            for bound, hits in zip(self.BUCKETS + ("+Inf",), buckets):
+                cumulative += hits
+                by_bound[str(bound)] = cumulative
+            stages[stage] = {"count": count, "sum": total, "avg": total / count if count else 0.0,
+                             "p50": self._quantile(buckets, count, 0.5),
+                             "p95": self._quantile(buckets, count, 0.95),
+                             "buckets": by_bound}
+        return {"timestamp": time.time(), "counters": counters, "gauges": gauges, "stages": stages,
+                "rules": rules}
+    
+    def to_prometheus(self, snapshot=None):
+        """Snapshot no formato de exposição em texto do Prometheus"""
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines.append(f"# TYPE organizer_{name}_total counter")
+            lines.append(f"organizer_{name}_total {value}")
+        for name, value in snapshot["gauges"].items():
+            if value is not None:
+                lines.append(f"# TYPE organizer_{name} gauge")
+                lines.append(f"organizer_{name} {value}")
+        if snapshot["stages"]:
+            lines.append("# TYPE organizer_stage_seconds histogram")
+        for stage, data in snapshot["stages"].items():
+            for bound, cumulative in data["buckets"].items():
+                lines.append(f'organizer_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'organizer_stage_seconds_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+            lines.append(f'organizer_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        if snapshot["rules"]:
+            lines.append("# TYPE organizer_rule_hits_total counter")
+            lines.extend(f'organizer_rule_hits_total{{rule="{category}"}} {data["hits"]}'
+                         for category, data in snapshot["rules"].items())
+            lines.append("# TYPE organizer_rule_evaluations_total counter")
+            lines.extend(f'organizer_rule_evaluations_total{{rule="{category}"}} {data["evaluations"]}'
+                         for category, data in snapshot["rules"].items())
+            lines.append("# TYPE organizer_rule_eval_seconds_total counter")
+            lines.extend(f'organizer_rule_eval_seconds_total{{rule="{category}"}} {data["seconds"]:.6f}'
+                         for category, data in snapshot["rules"].items())
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path):
+        """Grava o snapshot em JSON (.json) ou em texto do Prometheus (demais extensões)
+        
+        A escrita é atômica, para que coletores (ex.: textfile do node_exporter) nunca
+        leiam um arquivo pela metade.
+        """
+        snapshot = self.snapshot()
+        if path.lower().endswith(".json"):
+            content = json.dumps(snapshot, indent=2)
+        else:
+            content = self.to_prometheus(snapshot)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    
+    def status_line(self):
+        """Resumo de uma linha para a barra de status da interface"""
+        snapshot = self.snapshot()
+        counters = snapshot["counters"]
+        parts = [f"📈 {counters['files_moved']} movidos",
+                 f"{counters['files_skipped']} ignorados",
+                 f"{counters['files_errored']} erros",
+                 f"{counters['bytes_moved'] / 1048576:,.1f} MB"]
+        depth = snapshot["gauges"].get("watch_queue_depth")
+        if depth is not None:
+            parts.append(f"fila {depth}")
+        move = snapshot["stages"].get("move")
+        if move and move["p95"] is not None:
+            parts.append(f"move p95 ≤ {move['p95'] * 1000:g} ms")
+        return " · ".join(parts)
+
+class PredicateRule:
+    """Regra com condições além da extensão, compilada uma única vez
+    
+    Campos aceitos (todas as condições presentes precisam ser verdadeiras):
+    extensions, name_glob (texto ou lista, sem diferenciar maiúsculas), name_regex
+    (re.search sobre o nome), min_size_mb/max_size_mb e min_age_days/max_age_days
+    (pelo mtime). As condições são avaliadas da mais barata para a mais cara:
+    extensão, nome e, só então, as que dependem de stat.
+    """
+    
+    FIELDS = ("name_glob", "name_regex", "min_size_mb", "max_size_mb", "min_age_days", "max_age_days")
+    
+    def __init__(self, position, category, rule):
+        self.position = position
+        self.category = category
+        self.folder = rule["folder"]
+        try:
+            extensions = rule.get("extensions")
+            self.extensions = frozenset(FileOrganizer.normalize_extension(ext) for ext in extensions) if extensions else None
+            
+            globs = rule.get("name_glob")
+            if isinstance(globs, str):
+                globs = [globs]
+            self.name_glob = (re.compile("|".join(fnmatch.translate(glob) for glob in globs), re.IGNORECASE)
+                              if globs else None)
+            self.name_regex = re.compile(rule["name_regex"]) if rule.get("name_regex") else None
+            
+            mb = 1024 * 1024
+            day = 24 * 60 * 60
+            self.min_size = self._number(rule, "min_size_mb", mb)
+            self.max_size = self._number(rule, "max_size_mb", mb)
+            self.min_age = self._number(rule, "min_age_days", day)
+            self.max_age = self._number(rule, "max_age_days", day)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Regra '{category}' inválida: {e}") from None
+        self.needs_stat = any(limit is not None for limit in (self.min_size, self.max_size, self.min_age, self.max_age))
+    
+    @staticmethod
+    def _number(rule, field, unit):
+        """Limite numérico do campo já convertido para a unidade (bytes ou segundos), ou None"""
+        value = rule.get(field)
+        if value is None:
+            return None
+        # bool é subclasse de int, mas "min_size_mb": true é um erro de digitação
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"{field} deve ser um número, não {value!r}")
+        return value * unit
+    
+    @classmethod
+    def is_predicate(cls, rule):
+        """Indica se a regra usa alguma condição além de extensions"""
+        return any(rule.get(field) is not None for field in cls.FIELDS)
+    
+    def matches(self, name, suffixes, facts, file_path):
+        """Avalia as condições; facts = [stat, agora] é compartilhado entre as regras do arquivo"""
+        if self.extensions is not None and self.extensions.isdisjoint(suffixes):
+            return False
+        if self.name_glob is not None and not self.name_glob.match(name):
+            return False
+        if self.name_regex is not None and not self.name_regex.search(name):
+            return False
+        if not self.needs_stat:
+            return True
+        
+        stat_result = facts[0]
+        if stat_result is None:
+            try:
+                stat_result = facts[0] = os.stat(file_path)
+            except OSError:
+                return False
+        size = stat_result.st_size
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.min_age is not None or self.max_age is not None:
+            if facts[1] is None:
+                facts[1] = time.time()
+            age = facts[1] - stat_result.st_mtime
+            if self.min_age is not None and age < self.min_age:
+                return False
+            if self.max_age is not None and age > self.max_age:
+                return False
+        return True
 
 class FileOrganizer:
-    def __init__(self):
-        self.config_file = "organizer_config.json"
+    def __init__(self, config_file="organizer_config.json"):
+        self.config_file = config_file
         self.default_config = {
             "rules": {
                 "images": {
@@ -59,10 +1281,59 @@ class FileOrganizer:
             "date_format": "%Y-%m",
             "watched_folders": [],
             "ignore_hidden": True,
-            "create_subfolders": True
+            "create_subfolders": True,
+            "workers": 1,
+            "recursive_depth": 0,
+            "watch_quiet_period": 1.0,
+            "watch_batch_size": 100,
+            "journal_enabled": True,
+            "journal_file": "organizer_journal.db",
+            "log_flush_ms": 100,
+            "log_max_lines": 2000,
+            "copy_buffer_mb": 8,
+            "copy_progress_mb": 64,
+            "content_sniffing": False,
+            "dedup_action": "off",
+            "dedup_quarantine_folder": "♻️ Duplicados",
+            "hash_cache_file": "organizer_hashes.db",
+            "metrics_enabled": False,
+            "metrics_file": "",
+            "async_io": False,
+            "async_workers": 32,
+            "async_per_directory": 4,
+            "async_per_device": 16,
+            "async_max_pending": 256,
+            "scan_index": False,
+            "scan_index_file": "organizer_scan.db",
+            "scan_chunk_size": 1000
         }
+        self._rule_index = {}
+        self._max_suffix_parts = 1
+        self._indexed_rules = None
+        self.name_cache = TargetNameCache()
+        self._device_cache = {}
+        self._no_link_devices = set()
+        self._target_dirs = {}
+        # Destinos já decididos pelo AsyncFileOrganizer: caminho -> (stat, categoria, pasta)
+        self._resolved_targets = {}
+        self._known_dirs = set()
+        self._date_folders = {}
+        self.sniffer = ContentSniffer()
+        self._journal = None
+        self._journal_lock = Lock()
+        self._hash_cache = None
+        self._async = None
+        self._scan_index = None
         self.config = self.load_config()
-        self.observer = None
+        self.metrics = Metrics(self.config.get("metrics_enabled", False))
+        try:
+            self.rebuild_rule_index()
+        except Exception as e:
+            # Regras inválidas no arquivo não podem impedir a abertura (nem a janela de configuração)
+            print(f"Erro nas regras da configuração, usando as regras padrão: {e}")
+            self.config["rules"] = self.default_config["rules"]
+            self.rebuild_rule_index()
+        self.monitor = None
         self.monitoring = False
         
     def load_config(self):
@@ -87,114 +1358,1454 @@ class FileOrganizer:
         except Exception as e:
             print(f"Erro ao salvar config: {e}")
     
-    def get_file_category(self, file_path):
-        """Determina a categoria do arquivo baseada na extensão"""
-        extension = Path(file_path).suffix.lower()
+    @staticmethod
+    def normalize_extension(extension):
+        extension = extension.lower()
+        return extension if extension.startswith('.') else '.' + extension
+    
+    def rebuild_rule_index(self, rules=None):
+        """Recompila as regras: índice extensão → (categoria, pasta) e regras com condições
         
-        for category, rule in self.config["rules"].items():
-            if extension in rule["extensions"]:
-                return category, rule["folder"]
+        Regras só com "extensions" vão para o índice; as demais são compiladas em
+        PredicateRule. Levanta ValueError (sem alterar nada) se alguma regra for inválida.
+        """
+        if rules is None:
+            rules = self.config["rules"]
+        index = {}
+        positions = {}
+        predicate_rules = []
+        max_parts = 1
+        for position, (category, rule) in enumerate(rules.items()):
+            for extension in rule.get("extensions", []):
+                max_parts = max(max_parts, self.normalize_extension(extension).count('.'))
+            if PredicateRule.is_predicate(rule):
+                predicate_rules.append(PredicateRule(position, category, rule))
+                continue
+            positions[category] = position
+            for extension in rule.get("extensions", []):
+                # A primeira regra que declara a extensão vence, como na busca linear
+                index.setdefault(self.normalize_extension(extension), (category, rule["folder"]))
+        # Por sufixo, só as regras com condições que podem casar com ele (na ordem das regras)
+        unrestricted = [rule for rule in predicate_rules if rule.extensions is None]
+        by_suffix = {}
+        for extension in {ext for rule in predicate_rules if rule.extensions for ext in rule.extensions}:
+            by_suffix[extension] = [rule for rule in predicate_rules
+                                    if rule.extensions is None or extension in rule.extensions]
+        self._rule_index = index
+        self._rule_positions = positions
+        self._predicate_rules = predicate_rules
+        self._predicate_unrestricted = unrestricted
+        self._predicate_by_suffix = by_suffix
+        self._max_suffix_parts = max_parts
+        self._indexed_rules = rules
+    
+    def _suffixes(self, name):
+        """Sufixos candidatos do nome (em minúsculas), do mais longo ao mais curto"""
+        if name.endswith('.'):
+            return ()
+        parts = name.lstrip('.').split('.')[1:]
+        count = min(self._max_suffix_parts, len(parts))
+        return tuple('.' + '.'.join(parts[-n:]) for n in range(count, 0, -1))
+    
+    def get_file_category(self, file_path, stat_result=None):
+        """Determina a categoria do arquivo pelas regras (a primeira que casar vence)
         
+        stat_result evita um stat quando alguma regra depende de tamanho ou idade;
+        se faltar, é obtido uma única vez e compartilhado entre as regras.
+        """
+        # Regras substituídas diretamente em self.config também invalidam o índice
+        if self.config["rules"] is not self._indexed_rules:
+            self.rebuild_rule_index()
+        
+        basename = os.path.basename(file_path)
+        name = basename.lower()
+        match = None
+        suffix = None
+        if self._max_suffix_parts == 1:
+            # Caso comum, sem sufixos compostos: mesma regra de Path.suffix
+            dot = name.rfind('.')
+            if 0 < dot < len(name) - 1:
+                suffix = name[dot:]
+                match = self._rule_index.get(suffix)
+        elif not name.endswith('.'):
+            # Sufixos compostos (.tar.gz) têm prioridade sobre o último sufixo (.gz)
+            for suffix in self._suffixes(name):
+                match = self._rule_index.get(suffix)
+                if match:
+                    break
+        
+        if not self._predicate_rules:
+            if match:
+                if self.metrics.enabled:
+                    self.metrics.rule(match[0], 0.0, True)
+                return match
+            return "outros", "📁 Outros"
+        
+        # Só regras com condições declaradas antes da regra achada no índice podem vencê-la
+        metrics = self.metrics
+        limit = self._rule_positions[match[0]] if match else len(self._indexed_rules)
+        if self._max_suffix_parts == 1:
+            suffixes = (suffix,) if suffix else ()
+            candidates = self._predicate_by_suffix.get(suffix, self._predicate_unrestricted)
+        else:
+            suffixes = self._suffixes(name)
+            candidates = self._predicate_rules
+        facts = [stat_result, None]
+        for rule in candidates:
+            if rule.position >= limit:
+                break
+            started = metrics.start()
+            hit = rule.matches(basename, suffixes, facts, file_path)
+            if metrics.enabled:
+                metrics.rule(rule.category, time.perf_counter() - started, hit)
+            if hit:
+                return rule.category, rule.folder
+        if match:
+            if metrics.enabled:
+                metrics.rule(match[0], 0.0, True)
+            return match
         return "outros", "📁 Outros"
     
-    def organize_file(self, file_path, destination_folder, log_callback=None):
-        """Organiza um arquivo específico"""
+    def derive(self, **overrides):
+        """Cria um organizador com opções sobrepostas que compartilha caches e diário com este"""
+        config = dict(self.config, **overrides)
+        # Abre aqui os bancos que o derivado vai usar: aberto depois, cada cópia teria o seu
+        self.get_journal()
+        if config.get("scan_index", False):
+            with self._journal_lock:
+                if self._scan_index is None:
+                    self._scan_index = ScanIndex(config.get("scan_index_file", "organizer_scan.db"))
+        if config.get("dedup_action", "off") != "off":
+            self.get_hash_cache()
+        child = copy.copy(self)
+        child.config = config
+        child.rebuild_rule_index()
+        return child
+    
+    def get_journal(self):
+        """Retorna o diário de movimentações, abrindo-o na primeira chamada (None se desativado)"""
+        if not self.config.get("journal_enabled", True):
+            return None
+        with self._journal_lock:
+            if self._journal is None:
+                self._journal = MoveJournal(self.config.get("journal_file", "organizer_journal.db"))
+            return self._journal
+    
+    def scan_fingerprint(self):
+        """Impressão das opções que decidem o que fica na pasta e quais subpastas são puladas"""
+        options = {key: self.config.get(key) for key in
+                   ("ignore_hidden", "dedup_action", "dedup_quarantine_folder", "organize_by_date", "date_format")}
+        options["rules"] = self.config["rules"]
+        encoded = json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    
+    def get_scan_index(self):
+        """Retorna o índice de varreduras, abrindo-o na primeira chamada (None se desativado)"""
+        if not self.config.get("scan_index", False):
+            return None
+        with self._journal_lock:
+            if self._scan_index is None:
+                self._scan_index = ScanIndex(self.config.get("scan_index_file", "organizer_scan.db"))
+            return self._scan_index
+    
+    def get_async(self):
+        """Retorna o AsyncFileOrganizer deste organizador, iniciando-o na primeira chamada"""
+        with self._journal_lock:
+            if self._async is None:
+                self._async = AsyncFileOrganizer.from_config(self)
+                self._async.start()
+            return self._async
+    
+    def resolve_target_dir(self, file_path, stat_result, destination_folder):
+        """Retorna (categoria, pasta de destino) do arquivo"""
+        # Resolvido antes para escolher os limites do loop assíncrono, com o mesmo stat
+        resolved = self._resolved_targets.pop(file_path, None)
+        if resolved is not None and resolved[0] is stat_result:
+            return resolved[1], resolved[2]
+        category, category_folder = self.get_file_category(file_path, stat_result)
+        # Sem extensão conhecida: tenta identificar o tipo pelo conteúdo
+        if category == "outros" and self.config.get("content_sniffing", False):
+            sniffed = self.sniffer.classify(file_path, stat_result)
+            rule = self.config["rules"].get(sniffed) if sniffed else None
+            if rule:
+                category, category_folder = sniffed, rule["folder"]
+        date_folder = None
+        if self.config.get("organize_by_date", False):
+            date_folder = self._date_folder(stat_result.st_mtime)
+        
+        # Poucas pastas distintas para muitos arquivos: os caminhos montados ficam em cache
+        key = (destination_folder, date_folder, category_folder)
+        target_dir = self._target_dirs.get(key)
+        if target_dir is None:
+            if date_folder is None:
+                target_dir = os.path.join(destination_folder, category_folder)
+            else:
+                target_dir = os.path.join(destination_folder, date_folder, category_folder)
+            self._target_dirs[key] = target_dir
+        return category, target_dir
+    
+    # Diretivas de strftime que mudam dentro de um intervalo de 15 minutos
+    _FINE_DATE_DIRECTIVES = set("MSfXcTRrs")
+    DATE_BUCKET_SECONDS = 900
+    
+    def _date_folder(self, mtime):
+        """Nome da pasta de data, memorizado por intervalo de 15 minutos do mtime
+        
+        Fusos horários e mudanças de horário de verão são múltiplos de 15 minutos, então
+        todo o intervalo cai na mesma hora/dia/mês. Formatos com minutos ou segundos
+        são formatados a cada arquivo.
+        """
+        date_format = self.config.get("date_format", "%Y-%m")
+        # A análise do formato fica no mesmo memo, com o próprio formato como chave
+        fine = self._date_folders.get(date_format)
+        if fine is None:
+            directives = re.findall(r"%[-_0^#EO]*(.)", date_format)
+            fine = self._date_folders[date_format] = bool(self._FINE_DATE_DIRECTIVES.intersection(directives))
+        if fine:
+            return datetime.fromtimestamp(mtime).strftime(date_format)
+        
+        key = (date_format, int(mtime // self.DATE_BUCKET_SECONDS))
+        folder = self._date_folders.get(key)
+        if folder is None:
+            if len(self._date_folders) >= 100000:
+                self._date_folders.clear()
+            folder = self._date_folders[key] = datetime.fromtimestamp(mtime).strftime(date_format)
+        return folder
+    
+    def _ensure_dir(self, target_dir):
+        """Cria a pasta de destino na primeira vez em que aparece na varredura"""
+        if target_dir not in self._known_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            self._known_dirs.add(target_dir)
+    
+    def _forget_dir(self, target_dir):
+        """Invalida uma pasta de destino que deixou de existir"""
+        self._known_dirs.discard(target_dir)
+        self.name_cache.forget(target_dir)
+    
+    def _reset_sweep_caches(self):
+        """Cada varredura começa com uma visão atualizada das pastas de destino"""
+        self.name_cache.clear()
+        self._device_cache.clear()
+        self._resolved_targets.clear()
+        self._known_dirs.clear()
+        self._date_folders.clear()
+    
+    def organize_file(self, file_path, destination_folder, log_callback=None, stat_result=None,
+                      run_id=None, target=None):
+        """Organiza um arquivo específico
+        
+        stat_result pode ser passado por quem já tem o stat do arquivo (ex.: DirEntry.stat())
+        para evitar uma nova chamada ao sistema de arquivos. Com run_id a movimentação é
+        registrada no diário dessa execução. target=(pasta, nome) usa um destino já
+        decidido, como o de uma entrada de MovePlan.
+        """
+        metrics = self.metrics
+        started = metrics.start()
+        filename = os.path.basename(file_path)
         try:
-            if not os.path.isfile(file_path):
-                return False, "Arquivo não encontrado"
-            
             # Ignora arquivos ocultos se configurado
-            if self.config.get("ignore_hidden", True) and Path(file_path).name.startswith('.'):
+            if self.config.get("ignore_hidden", True) and filename.startswith('.'):
+                metrics.count("files_skipped")
                 return False, "Arquivo oculto ignorado"
             
-            filename = os.path.basename(file_path)
-            category, category_folder = self.get_file_category(file_path)
+            if stat_result is None:
+                try:
+                    stat_result = os.stat(file_path)
+                except OSError:
+                    metrics.count("files_skipped")
+                    return False, "Arquivo não encontrado"
+                started = metrics.lap("stat", started)
+            if not stat.S_ISREG(stat_result.st_mode):
+                metrics.count("files_skipped")
+                return False, "Arquivo não encontrado"
             
-            # Determina pasta de destino
-            if self.config.get("organize_by_date", False):
-                file_date = datetime.fromtimestamp(os.path.getmtime(file_path))
-                date_folder = file_date.strftime(self.config.get("date_format", "%Y-%m"))
-                target_dir = os.path.join(destination_folder, date_folder, category_folder)
+            # Determina pasta de destino (um plano já traz pasta e nome decididos)
+            if target is None:
+                category, target_dir = self.resolve_target_dir(file_path, stat_result, destination_folder)
+                target_name = filename
+                started = metrics.lap("categorize", started)
             else:
-                target_dir = os.path.join(destination_folder, category_folder)
+                target_dir, target_name = target
             
-            # Cria diretório se não existir
-            os.makedirs(target_dir, exist_ok=True)
-            
-            # Define caminho final
-            target_path = os.path.join(target_dir, filename)
-            
-            # Resolve conflitos de nome
-            counter = 1
-            original_target = target_path
-            while os.path.exists(target_path):
-                name, ext = os.path.splitext(filename)
-                target_path = os.path.join(target_dir, f"{name}_{counter}{ext}")
-                counter += 1
+            retries = 1
+            while True:
+                # Cria diretório se não existir (uma vez por varredura)
+                self._ensure_dir(target_dir)
+                started = metrics.lap("makedirs", started)
+                
+                target_path = None
+                intent_id = None
+                try:
+                    # No mesmo dispositivo, o hard link reserva o nome e move o arquivo de uma vez
+                    target_path = self._claim_by_link(file_path, target_dir, target_name, stat_result)
+                    if target_path is not None:
+                        started = metrics.lap("claim", started)
+                        os.unlink(file_path)
+                        break
+                    
+                    # Senão, reserva o nome com um arquivo vazio; a reserva vai para o diário
+                    # para não ficar órfã se o processo cair antes de o arquivo tomar seu lugar
+                    target_path = self.name_cache.claim(target_dir, target_name)
+                    if run_id is not None:
+                        intent_id = self.get_journal().intend(run_id, os.path.abspath(file_path),
+                                                              os.path.abspath(target_path))
+                    started = metrics.lap("claim", started)
+                    
+                    # Move o arquivo
+                    self._move_file(file_path, target_path, stat_result, log_callback)
+                    break
+                except BaseException as e:
+                    if target_path is not None:
+                        self.name_cache.release(target_path)
+                    if intent_id is not None:
+                        self.get_journal().drop_intent(intent_id)
+                    # A pasta de destino sumiu durante a execução: recria e tenta mais uma vez
+                    if (retries and isinstance(e, FileNotFoundError) and not os.path.isdir(target_dir)
+                            and os.path.lexists(file_path)):
+                        retries -= 1
+                        self._forget_dir(target_dir)
+                        continue
+                    raise
+            started = metrics.lap("move", started)
             
-            # Move o arquivo
-            shutil.move(file_path, target_path)
+            if run_id is not None:
+                self.get_journal().record(run_id, os.path.abspath(file_path), os.path.abspath(target_path),
+                                          stat_result.st_size, stat_result.st_mtime, intent_id)
+                started = metrics.lap("journal", started)
             
             message = f"✅ {filename} → {os.path.relpath(target_path, destination_folder)}"
             if log_callback:
                 log_callback(message)
+                metrics.lap("log", started)
             
+            metrics.count("files_moved")
+            metrics.count("bytes_moved", stat_result.st_size)
             return True, message
             
         except Exception as e:
+            metrics.count("files_errored")
             error_msg = f"❌ Erro ao mover {filename}: {str(e)}"
             if log_callback:
                 log_callback(error_msg)
             return False, error_msg
     
-    def organize_folder(self, folder_path, log_callback=None):
-        """Organiza todos os arquivos de uma pasta"""
-        if not os.path.exists(folder_path):
+    def _claim_by_link(self, file_path, target_dir, target_name, stat_result):
+        """Move criando o nome final como hard link da origem (a remoção fica com quem chama)
+        
+        os.link não sobrescreve, então reserva e movimentação são um único passo: não
+        há arquivo vazio que possa ficar para trás. Retorna None se não der para
+        usar link (outro dispositivo, sistema de arquivos sem suporte, permissão).
+        """
+        device = stat_result.st_dev
+        if device in self._no_link_devices or device != self._directory_device(target_dir):
+            return None
+        
+        # Execução interrompida entre o link e a remoção da origem: o nome já é dela
+        if stat_result.st_nlink > 1:
+            target_path = os.path.join(target_dir, target_name)
+            try:
+                if os.path.samestat(os.lstat(file_path), os.lstat(target_path)):
+                    return target_path
+            except OSError:
+                pass
+        
+        def create(target_path):
+            os.link(file_path, target_path, **_LINK_OPTIONS)
+        
+        try:
+            return self.name_cache.claim(target_dir, target_name, create)
+        except OSError as e:
+            if e.errno in (errno.ENOTSUP, errno.EOPNOTSUPP):
+                self._no_link_devices.add(device)
+            elif e.errno not in (errno.EPERM, errno.EACCES, errno.EMLINK, errno.EXDEV):
+                raise
+            return None
+    
+    def _directory_device(self, directory):
+        """st_dev da pasta, consultado uma única vez por varredura"""
+        device = self._device_cache.get(directory)
+        if device is None:
+            device = self._device_cache[directory] = os.stat(directory).st_dev
+        return device
+    
+    def destination_device(self, target_dir, destination_folder):
+        """st_dev de onde o arquivo vai parar (a pasta de destino pode ainda não existir)"""
+        for directory in (target_dir, destination_folder):
+            try:
+                return self._directory_device(directory)
+            except OSError:
+                pass
+        return None
+    
+    def _move_file(self, file_path, target_path, stat_result, log_callback=None):
+        """Move com os.replace no mesmo dispositivo ou com cópia em streaming entre dispositivos
+        
+        target_path já existe (reservado por TargetNameCache) e é sobrescrito.
+        stat_result segue links simbólicos; um link é sempre movido como link,
+        nunca copiando o conteúdo do arquivo para o qual ele aponta.
+        """
+        if stat_result.st_dev == self._directory_device(os.path.dirname(target_path)):
+            try:
+                os.replace(file_path, target_path)
+                return
+            except OSError as e:
+                # Mesmo st_dev nem sempre garante rename (ex.: bind mounts, overlayfs)
+                if e.errno != errno.EXDEV:
+                    raise
+        
+        if stat.S_ISLNK(os.lstat(file_path).st_mode):
+            self._move_symlink(file_path, target_path)
+            return
+        self._copy_across_devices(file_path, target_path, stat_result, log_callback)
+    
+    @staticmethod
+    def _move_symlink(file_path, target_path):
+        """Move o próprio link simbólico: rename se possível, senão recria o link no destino"""
+        try:
+            os.replace(file_path, target_path)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        link = os.readlink(file_path)
+        os.unlink(target_path)
+        os.symlink(link, target_path)
+        os.unlink(file_path)
+    
+    @staticmethod
+    def _partial_path(target_path):
+        """Arquivo temporário, ao lado do destino, que recebe a cópia entre dispositivos"""
+        directory, name = os.path.split(target_path)
+        return os.path.join(directory, f".{name}.organizer-part")
+    
+    def _copy_across_devices(self, file_path, target_path, stat_result, log_callback=None):
+        """Copia em streaming, confere o resultado e só então remove a origem
+        
+        A cópia vai para um temporário ao lado do destino e só substitui o nome
+        reservado com os.replace depois do fsync: uma queda no meio da cópia nunca
+        deixa um arquivo truncado com o nome final.
+        """
+        size = stat_result.st_size
+        filename = os.path.basename(file_path)
+        progress_every = self.config.get("copy_progress_mb", 64) * 1024 * 1024
+        start = time.monotonic()
+        
+        progress = None
+        if log_callback and size >= progress_every:
+            next_report = [progress_every]
+            
+            def progress(copied):
+                if copied >= next_report[0]:
+                    next_report[0] += progress_every
+                    rate = copied / max(time.monotonic() - start, 1e-6)
+                    log_callback(f"📦 {filename}: {copied / 1048576:,.0f}/{size / 1048576:,.0f} MB "
+                                 f"({rate / 1048576:,.1f} MB/s)")
+        
+        buffer_size = self.config.get("copy_buffer_mb", 8) * 1024 * 1024
+        partial_path = self._partial_path(target_path)
+        try:
+            with open(file_path, 'rb') as source, open(partial_path, 'wb') as target:
+                copied = stream_copy(source, target, size, buffer_size, progress)
+                target.flush()
+                os.fsync(target.fileno())
+            
+            # A origem não pode ter mudado durante a cópia
+            current = os.stat(file_path)
+            if copied != size or current.st_size != size or current.st_mtime_ns != stat_result.st_mtime_ns:
+                raise OSError(errno.EIO, f"cópia incompleta ({copied} de {size} bytes)")
+            
+            shutil.copystat(file_path, partial_path)
+            os.replace(partial_path, target_path)
+        except BaseException:
+            if os.path.lexists(partial_path):
+                os.remove(partial_path)
+            raise
+        os.unlink(file_path)
+        
+        if progress:
+            elapsed = max(time.monotonic() - start, 1e-6)
+            log_callback(f"📦 {filename}: {size / 1048576:,.0f} MB copiados entre dispositivos "
+                         f"em {elapsed:.1f}s ({size / elapsed / 1048576:,.1f} MB/s)")
+    
+    def _is_managed_dir(self, name):
+        """Indica se a subpasta foi criada pelo organizador (categoria ou data)"""
+        if name in ("📁 Outros", self.config.get("dedup_quarantine_folder", "♻️ Duplicados")):
+            return True
+        if any(rule["folder"] == name for rule in self.config["rules"].values()):
+            return True
+        if self.config.get("organize_by_date", False):
+            try:
+                datetime.strptime(name, self.config.get("date_format", "%Y-%m"))
+                return True
+            except ValueError:
+                pass
+        return False
+    
+    def scan_folder(self, folder_path, max_depth=0, scan=None):
+        """Lista os arquivos da pasta com os.scandir, sem descer em subpastas por padrão
+        
+        Com max_depth > 0 desce até essa profundidade, ignorando as pastas de
+        categoria e de data criadas pelo próprio organizador e, com "ignore_hidden",
+        as pastas ocultas (ex.: .git). Retorna os DirEntry,
+        cujo stat fica em cache para as etapas seguintes. Com um IncrementalScan,
+        pastas e arquivos inalterados desde a última varredura são pulados.
+        """
+        ignore_hidden = self.config.get("ignore_hidden", True)
+        pending = [(folder_path, 0)]
+        while pending:
+            current, depth = pending.pop()
+            known = {}
+            if scan is not None:
+                unchanged, known = scan.known_state(current)
+                if unchanged:
+                    # Pasta inalterada: só as subpastas conhecidas podem ter mudado
+                    if depth < max_depth:
+                        pending.extend((os.path.join(current, name), depth + 1)
+                                       for name, state in known.items() if state[0] == "d")
+                    continue
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if known and scan.is_unchanged(entry, known):
+                            continue
+                        yield entry
+                    elif (depth < max_depth and entry.is_dir(follow_symlinks=False)
+                            and not (ignore_hidden and entry.name.startswith('.'))
+                            and not self._is_managed_dir(entry.name)):
+                        pending.append((entry.path, depth + 1))
+    
+    def _organize_entry(self, entry, destination_folder, log_callback=None, run_id=None):
+        """Organiza um DirEntry reaproveitando o stat obtido na listagem"""
+        if self.config.get("ignore_hidden", True) and entry.name.startswith('.'):
+            self.metrics.count("files_skipped")
+            return False, "Arquivo oculto ignorado"
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            self.metrics.count("files_skipped")
+            return False, "Arquivo não encontrado"
+        return self.organize_file(entry.path, destination_folder, log_callback, stat_result, run_id)
+    
+    def recover_interrupted(self, folder_path, log_callback=None):
+        """Conclui as movimentações que execuções abandonadas da pasta deixaram pela metade
+        
+        Só os pares (origem, destino) anunciados no diário com intend() são
+        examinados: se o destino já tem o conteúdo completo da origem, a origem é
+        removida; se a origem sumiu e o destino existe, a movimentação só não chegou
+        a ser registrada. Se a origem continua lá e o destino é só a reserva vazia
+        criada por TargetNameCache, a reserva é apagada. Nos demais casos a intenção
+        é descartada. Retorna quantos arquivos foram concluídos.
+        """
+        journal = self.get_journal()
+        if not journal:
+            return 0
+        recovered = 0
+        for intent_id, run_id, source, target in journal.stale_intents(folder_path):
+            try:
+                target_stat = os.lstat(target)
+            except OSError:
+                target_stat = None
+            try:
+                # Cópia interrompida no meio: o temporário nunca chegou ao nome final
+                partial_path = self._partial_path(target)
+                if os.path.lexists(partial_path):
+                    os.remove(partial_path)
+                if target_stat is None or not stat.S_ISREG(target_stat.st_mode):
+                    journal.drop_intent(intent_id)
+                    continue
+                if os.path.lexists(source):
+                    if not (os.path.getsize(source) == target_stat.st_size
+                            and filecmp.cmp(source, target, shallow=False)):
+                        if target_stat.st_size == 0:
+                            os.remove(target)
+                        journal.drop_intent(intent_id)
+                        continue
+                    os.unlink(source)
+                journal.record(run_id, source, target, target_stat.st_size, target_stat.st_mtime, intent_id)
+            except OSError as e:
+                if log_callback:
+                    log_callback(f"❌ Erro ao concluir {os.path.basename(source)}: {str(e)}")
+                continue
+            recovered += 1
+            self.metrics.count("files_moved")
+            if log_callback:
+                log_callback(f"✅ {os.path.basename(source)} → {os.path.relpath(target, folder_path)} "
+                             f"(cópia interrompida concluída)")
+        return recovered
+    
+    def organize_folder(self, folder_path, log_callback=None, max_depth=None, full=False):
+        """Organiza todos os arquivos de uma pasta
+        
+        max_depth controla a descida em subpastas (0 = apenas o nível superior);
+        se omitido, usa a opção "recursive_depth" da configuração. Com "scan_index"
+        ativado só o que mudou desde a última varredura é processado, a menos que
+        full=True.
+        """
+        if not os.path.isdir(folder_path):
             return False, "Pasta não encontrada"
         
+        if max_depth is None:
+            max_depth = int(self.config.get("recursive_depth", 0))
+        
         organized_count = 0
         error_count = 0
+        duplicate_count = 0
+        metrics = self.metrics
+        sweep_started = started = metrics.start()
+        
+        self._reset_sweep_caches()
         
         if log_callback:
             log_callback(f"🔄 Iniciando organização da pasta: {folder_path}")
         
-        # Lista todos os arquivos
-        for root, dirs, files in os.walk(folder_path):
-            if root != folder_path:  # Evita organizar subpastas já organizadas
-                continue
-                
-            for file in files:
-                file_path = os.path.join(root, file)
-                success, message = self.organize_file(file_path, folder_path, log_callback)
+        journal = self.get_journal()
+        run_id = None
+        resumed = False
+        if journal:
+            # Antes de abrir a execução: a retomada a tornaria ativa e fora da recuperação
+            organized_count += self.recover_interrupted(folder_path, log_callback)
+            run_id, resumed = journal.begin_run(folder_path)
+            if resumed and log_callback:
+                log_callback(f"♻️ Retomando execução interrompida #{run_id} "
+                             f"({len(journal.recorded_moves(run_id))} arquivos já movidos)")
+        
+        # Listagem preguiçosa (apenas os novos e alterados, com o índice)
+        index = self.get_scan_index()
+        scan = IncrementalScan(index, full, self.scan_fingerprint()) if index else None
+        entries = self.scan_folder(os.path.abspath(folder_path), max_depth, scan)
+        settled = {}
+        
+        def organize(entry):
+            return self._organize_entry(entry, folder_path, log_callback, run_id)
+        
+        dedup_action = self.config.get("dedup_action", "off")
+        chunk_size = int(self.config.get("scan_chunk_size", 1000))
+        if dedup_action == "off" and chunk_size > 0:
+            # Streaming: os arquivos entram no pool enquanto a listagem avança, com no
+            # máximo chunk_size em andamento, e a memória não cresce com a pasta
+            results = self._stream_workers(organize, self._timed_scan(entries, chunk_size), chunk_size)
+        else:
+            # Duplicados são comparados entre todos os arquivos: a listagem precisa estar completa
+            entries = list(entries)
+            started = metrics.lap("scan", started)
+            results = None
+        
+        # Duplicados são tratados antes, enquanto os originais ainda estão no lugar
+        duplicates = {}
+        if dedup_action != "off":
+            duplicates = self.find_duplicates(entries, folder_path, log_callback)
+        if duplicates:
+            def handle(entry):
+                return self._handle_duplicate(entry, duplicates[entry.path], folder_path,
+                                              dedup_action, log_callback, run_id)
+            
+            duplicate_entries = [e for e in entries if e.path in duplicates]
+            for entry, (success, message) in zip(duplicate_entries, self._map_workers(handle, duplicate_entries)):
                 if success:
-                    organized_count += 1
+                    duplicate_count += 1
+                    settled[entry.path] = message
                 else:
                     error_count += 1
+            entries = [entry for entry in entries if entry.path not in duplicates]
+        if dedup_action != "off":
+            metrics.lap("dedup", started)
+        
+        if results is None:
+            results = self._map_workers(organize, entries)
+        for success, message in results:
+            if success:
+                organized_count += 1
+            else:
+                error_count += 1
+        
+        if scan:
+            metrics.count("files_unchanged", scan.unchanged_files)
+            if log_callback and (scan.unchanged_dirs or scan.unchanged_files):
+                log_callback(f"⚡ Índice: {scan.unchanged_dirs} pastas e {scan.unchanged_files} "
+                             f"arquivos inalterados desde a última varredura")
+        if journal:
+            journal.finish_run(run_id)
+        if scan:
+            scan.finish(self, settled)
+        
+        summary = f"📊 Resumo: {organized_count} arquivos organizados, {error_count} erros"
+        if dedup_action != "off":
+            summary += f", {duplicate_count} duplicados"
+        if log_callback:
+            log_callback(summary)
+        
+        if metrics.enabled:
+            metrics.lap("sweep", sweep_started)
+            self.write_metrics()
+        return True, summary
+    
+    def _timed_scan(self, entries, size):
+        """Repassa a listagem registrando, a cada size entradas, o tempo gasto só listando"""
+        metrics = self.metrics
+        if not metrics.enabled:
+            yield from entries
+            return
+        iterator = iter(entries)
+        count = 0
+        elapsed = 0.0
+        while True:
+            started = time.perf_counter()
+            entry = next(iterator, None)
+            elapsed += time.perf_counter() - started
+            if entry is None:
+                break
+            count += 1
+            if count == size:
+                metrics.observe("scan", elapsed)
+                count = 0
+                elapsed = 0.0
+            yield entry
+        if count:
+            metrics.observe("scan", elapsed)
+    
+    def write_metrics(self):
+        """Grava o snapshot das métricas em metrics_file, se configurado"""
+        path = self.config.get("metrics_file")
+        if self.metrics.enabled and path:
+            try:
+                self.metrics.write(path)
+            except OSError as e:
+                print(f"Erro ao salvar métricas: {e}")
+
+    def get_hash_cache(self):
+        """Retorna o cache persistente de hashes, abrindo-o na primeira chamada"""
+        with self._journal_lock:
+            if self._hash_cache is None:
+                self._hash_cache = HashCache(self.config.get("hash_cache_file", "organizer_hashes.db"))
+            return self._hash_cache
+    
+    def find_duplicates(self, entries, destination_folder, log_callback=None):
+        """Compara os arquivos da varredura entre si e com os já existentes nas pastas de destino
+        
+        Retorna {caminho duplicado: caminho do original}.
+        """
+        ignore_hidden = self.config.get("ignore_hidden", True)
+        candidates = []
+        target_dirs = set()
+        for entry in entries:
+            if ignore_hidden and entry.name.startswith('.'):
+                continue
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            candidates.append((entry.path, stat_result))
+            target_dirs.add(self.resolve_target_dir(entry.path, stat_result, destination_folder)[1])
+        
+        # Só interessam arquivos existentes com tamanho igual ao de algum candidato
+        sizes = {stat_result.st_size for _, stat_result in candidates}
+        existing = []
+        for target_dir in target_dirs:
+            try:
+                with os.scandir(target_dir) as dir_entries:
+                    for entry in dir_entries:
+                        if entry.is_file(follow_symlinks=False):
+                            stat_result = entry.stat(follow_symlinks=False)
+                            if stat_result.st_size in sizes:
+                                existing.append((entry.path, stat_result))
+            except FileNotFoundError:
+                continue
+        
+        detector = DuplicateDetector(self.get_hash_cache(), int(self.config.get("workers", 1)))
+        duplicates = detector.find(candidates, existing)
+        if log_callback and duplicates:
+            log_callback(f"♻️ {len(duplicates)} arquivos duplicados encontrados")
+        return duplicates
+    
+    def _handle_duplicate(self, entry, original, destination_folder, action, log_callback=None, run_id=None):
+        """Aplica a ação configurada (skip, hardlink ou quarantine) a um arquivo duplicado"""
+        original_name = os.path.relpath(original, destination_folder)
+        if action == "skip":
+            self.metrics.count("files_skipped")
+            message = f"⏭️ {entry.name} é duplicado de {original_name}"
+            if log_callback:
+                log_callback(message)
+            return True, message
+        
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            return False, "Arquivo não encontrado"
+        
+        if action == "quarantine":
+            quarantine_dir = os.path.join(destination_folder,
+                                          self.config.get("dedup_quarantine_folder", "♻️ Duplicados"))
+            if log_callback:
+                log_callback(f"♻️ {entry.name} é duplicado de {original_name}")
+            return self.organize_file(entry.path, destination_folder, log_callback, stat_result, run_id,
+                                      (quarantine_dir, entry.name))
+        
+        # hardlink: o destino vira um link para o original e a cópia é apagada
+        try:
+            category, target_dir = self.resolve_target_dir(entry.path, stat_result, destination_folder)
+            self._ensure_dir(target_dir)
+            target_path = self.name_cache.claim(target_dir, entry.name)
+            intent_id = None
+            if run_id is not None:
+                intent_id = self.get_journal().intend(run_id, os.path.abspath(entry.path),
+                                                      os.path.abspath(target_path))
+            temp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.link"
+            try:
+                os.link(original, temp_path)
+                os.replace(temp_path, target_path)
+            except OSError:
+                self.name_cache.release(target_path)
+                if intent_id is not None:
+                    self.get_journal().drop_intent(intent_id)
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+                raise
+            os.unlink(entry.path)
+        except OSError as e:
+            # Sem suporte a hard link (ex.: outro dispositivo): move normalmente
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                return self.organize_file(entry.path, destination_folder, log_callback, stat_result, run_id)
+            error_msg = f"❌ Erro ao vincular {entry.name}: {str(e)}"
+            if log_callback:
+                log_callback(error_msg)
+            return False, error_msg
+        
+        if run_id is not None:
+            self.get_journal().record(run_id, os.path.abspath(entry.path), os.path.abspath(target_path),
+                                      stat_result.st_size, stat_result.st_mtime, intent_id)
+        self.metrics.count("files_moved")
+        message = f"🔗 {entry.name} → {os.path.relpath(target_path, destination_folder)} (link para {original_name})"
+        if log_callback:
+            log_callback(message)
+        return True, message
+    
+    def _map_workers(self, func, items):
+        """Aplica func aos itens, em paralelo se "workers" > 1, preservando a ordem"""
+        # Em pastas de rede a latência domina: vários workers sobrepõem as chamadas
+        workers = max(1, int(self.config.get("workers", 1)))
+        if workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(func, items))
+        return map(func, items)
+    
+    def _stream_workers(self, func, items, max_pending):
+        """Aplica func aos itens de um iterável, com no máximo max_pending em andamento
+        
+        Diferente de _map_workers, os itens são consumidos aos poucos por um único
+        pool e os resultados saem na ordem em que terminam: um arquivo lento (ex.:
+        cópia grande entre dispositivos) não segura os demais workers.
+        """
+        workers = max(1, int(self.config.get("workers", 1)))
+        if workers == 1:
+            yield from map(func, items)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            yield from _bounded_results(functools.partial(pool.submit, func), items, max(max_pending, workers))
+    
+    def plan_folder(self, folder_path, max_depth=None):
+        """Calcula o plano de organização da pasta sem mover nada
+        
+        Usa a mesma listagem, índice de regras e resolução de conflitos da varredura
+        real, mas os nomes são reservados apenas em memória.
+        """
+        if max_depth is None:
+            max_depth = int(self.config.get("recursive_depth", 0))
+        folder_path = os.path.abspath(folder_path)
+        ignore_hidden = self.config.get("ignore_hidden", True)
+        names = TargetNameCache()
+        plan = MovePlan(folder_path)
+        
+        for entry in self.scan_folder(folder_path, max_depth):
+            if ignore_hidden and entry.name.startswith('.'):
+                continue
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            category, target_dir = self.resolve_target_dir(entry.path, stat_result, folder_path)
+            final_name = names.reserve(target_dir, entry.name)
+            plan.entries.append(PlanEntry(entry.path, target_dir, final_name, category, stat_result.st_size))
+        return plan
+    
+    def apply_plan(self, plan, log_callback=None):
+        """Executa um plano calculado por plan_folder, em lotes no pool de workers"""
+        if log_callback:
+            log_callback(f"🔄 Aplicando plano de {len(plan)} arquivos em: {plan.folder}")
+        
+        self._reset_sweep_caches()
+        journal = self.get_journal()
+        run_id = journal.begin_run(plan.folder, "apply")[0] if journal else None
+        
+        def apply(entry):
+            # O arquivo pode ter mudado ou sumido desde o planejamento
+            try:
+                stat_result = os.stat(entry.source)
+            except OSError:
+                return False, "Arquivo não encontrado"
+            return self.organize_file(entry.source, plan.folder, log_callback, stat_result, run_id,
+                                      (entry.target_dir, entry.final_name))
+        
+        organized_count = 0
+        error_count = 0
+        for success, message in self._map_workers(apply, plan.entries):
+            if success:
+                organized_count += 1
+            else:
+                error_count += 1
+        
+        if journal:
+            journal.finish_run(run_id)
         
         summary = f"📊 Resumo: {organized_count} arquivos organizados, {error_count} erros"
         if log_callback:
             log_callback(summary)
+        return True, summary
+    
+    def undo_last_run(self, log_callback=None):
+        """Desfaz a última execução registrada no diário"""
+        journal = self.get_journal()
+        run = journal.last_run() if journal else None
+        if not run:
+            return False, "Nenhuma organização para desfazer"
+        
+        run_id, folder = run
+        if log_callback:
+            log_callback(f"↩️ Desfazendo execução #{run_id} em: {folder}")
+        restored, error_count = journal.undo_run(run_id, log_callback)
+        self._reset_sweep_caches()
         
+        summary = f"📊 Resumo: {restored} arquivos restaurados, {error_count} erros"
+        if log_callback:
+            log_callback(summary)
         return True, summary
 
-class FileWatcher(FileSystemEventHandler):
-    """Handler para monitoramento de arquivos em tempo real"""
+class AsyncFileOrganizer:
+    """Núcleo assíncrono para sistemas de arquivos remotos (NFS/SMB)
+    
+    Em montagens remotas cada stat, open e rename é uma ida e volta pela rede. Aqui
+    cada arquivo é organizado por FileOrganizer.organize_file em um executor limitado,
+    com no máximo per_directory operações simultâneas por pasta de destino e
+    per_device por dispositivo (st_dev) de destino. O event loop roda em uma thread
+    própria, então a interface e o monitoramento podem enviar trabalho à mesma
+    instância; com max_pending arquivos em andamento, submit() bloqueia quem envia.
+    """
     
-    def __init__(self, organizer, folder_path, log_callback=None):
+    def __init__(self, organizer, max_workers=32, per_directory=4, per_device=16, max_pending=256):
         self.organizer = organizer
-        self.folder_path = folder_path
+        self.max_workers = max(1, max_workers)
+        self.per_directory = max(1, per_directory)
+        self.per_device = max(1, per_device)
+        self.max_pending = max(1, max_pending)
+        _load_asyncio()
+        self._backlog = threading.BoundedSemaphore(self.max_pending)
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._slots = None
+        self._dir_limits = {}
+        self._device_limits = {}
+    
+    @classmethod
+    def from_config(cls, organizer):
+        """Cria a instância com as opções async_* da configuração"""
+        config = organizer.config
+        return cls(organizer,
+                   max_workers=int(config.get("async_workers", 32)),
+                   per_directory=int(config.get("async_per_directory", 4)),
+                   per_device=int(config.get("async_per_device", 16)),
+                   max_pending=int(config.get("async_max_pending", 256)))
+    
+    def start(self):
+        """Inicia o event loop em uma thread de fundo"""
+        if self._thread:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="organizer-io")
+        self._loop = asyncio.new_event_loop()
+        ready = Event()
+        
+        def run_loop():
+            asyncio.set_event_loop(self._loop)
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._loop.call_soon(ready.set)
+            self._loop.run_forever()
+            self._loop.close()
+        
+        self._thread = Thread(target=run_loop, daemon=True)
+        self._thread.start()
+        ready.wait()
+    
+    def stop(self):
+        """Para o event loop, aguardando as operações em andamento"""
+        if not self._thread:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self._thread = self._loop = self._executor = None
+        self._dir_limits.clear()
+        self._device_limits.clear()
+    
+    def run(self, coroutine):
+        """Executa uma corrotina no loop de fundo e aguarda o resultado (qualquer thread)"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    def submit(self, file_path, destination_folder, log_callback=None, stat_result=None, run_id=None,
+               organizer=None):
+        """Enfileira um arquivo e retorna um concurrent.futures.Future com (sucesso, mensagem)
+        
+        Bloqueia enquanto houver max_pending arquivos em andamento. organizer permite
+        usar um organizador derivado (ex.: regras de uma pasta monitorada).
+        """
+        self._backlog.acquire()
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self.organize_file(file_path, destination_folder, log_callback, stat_result, run_id,
+                                   organizer=organizer), self._loop)
+        except BaseException:
+            self._backlog.release()
+            raise
+        future.add_done_callback(lambda _: self._backlog.release())
+        return future
+    
+    def _limits(self, device, target_dir):
+        """Semáforos do dispositivo e da pasta de destino (criados sob demanda, na thread do loop)"""
+        device_limit = self._device_limits.get(device)
+        if device_limit is None:
+            device_limit = self._device_limits[device] = asyncio.Semaphore(self.per_device)
+        dir_limit = self._dir_limits.get(target_dir)
+        if dir_limit is None:
+            dir_limit = self._dir_limits[target_dir] = asyncio.Semaphore(self.per_directory)
+        return device_limit, dir_limit
+    
+    async def _call(self, device, target_dir, func, *args):
+        """Executa func no executor respeitando os limites por dispositivo e por pasta"""
+        device_limit, dir_limit = self._limits(device, target_dir)
+        async with device_limit, dir_limit:
+            return await self._loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    async def organize_file(self, file_path, destination_folder, log_callback=None, stat_result=None,
+                            run_id=None, target=None, organizer=None):
+        """Versão assíncrona de FileOrganizer.organize_file"""
+        organizer = organizer or self.organizer
+        
+        def resolve():
+            # stat e identificação pelo conteúdo também são idas e voltas: ficam fora do loop
+            current = stat_result or os.stat(file_path)
+            if target is not None:
+                decided = target
+            else:
+                decided = (organizer.resolve_target_dir(file_path, current, destination_folder)[1],
+                           os.path.basename(file_path))
+            return current, decided, organizer.destination_device(decided[0], destination_folder)
+        
+        try:
+            stat_result, decided, device = await self._loop.run_in_executor(self._executor, resolve)
+        except OSError:
+            organizer.metrics.count("files_skipped")
+            return False, "Arquivo não encontrado"
+        return await self._call(device, decided[0], organizer.organize_file, file_path,
+                                destination_folder, log_callback, stat_result, run_id, decided)
+    
+    async def _map(self, organizer, func, items, destination_folder):
+        """Aplica func aos itens com no máximo max_pending em andamento, preservando a ordem"""
+        async def call(item):
+            try:
+                return await self._call_item(organizer, func, item, destination_folder)
+            finally:
+                self._slots.release()
+        
+        tasks = []
+        for item in items:
+            await self._slots.acquire()
+            tasks.append(asyncio.ensure_future(call(item)))
+        return await asyncio.gather(*tasks)
+    
+    async def _call_item(self, organizer, func, item, destination_folder):
+        """Aplica func a um item de _map respeitando os limites por dispositivo e por pasta"""
+        def item_limits():
+            # Itens de plano (PlanEntry) já trazem a pasta; DirEntry precisa de stat e categoria
+            if isinstance(item, PlanEntry):
+                target_dir = item.target_dir
+            else:
+                try:
+                    stat_result = item.stat()
+                except OSError:
+                    return None, None
+                category, target_dir = organizer.resolve_target_dir(item.path, stat_result, destination_folder)
+                # func chega ao organize_file com o mesmo stat (DirEntry o guarda) e reaproveita o destino
+                organizer._resolved_targets[item.path] = (stat_result, category, target_dir)
+            return organizer.destination_device(target_dir, destination_folder), target_dir
+        
+        device, target_dir = await self._loop.run_in_executor(self._executor, item_limits)
+        return await self._call(device, target_dir, func, item)
+    
+    async def _stream_item(self, organizer, func, item, destination_folder):
+        """Como _call_item, ocupando uma das max_pending vagas enquanto roda"""
+        async with self._slots:
+            return await self._call_item(organizer, func, item, destination_folder)
+    
+    def _derive(self, destination_folder):
+        """Organizador que compartilha caches e diário, mas distribui o trabalho por este loop"""
+        organizer = self.organizer.derive()
+        
+        def map_workers(func, items):
+            # Chamado pela thread que conduz a varredura, nunca pela do loop
+            return self.run(self._map(organizer, func, items, destination_folder))
+        
+        def stream_workers(func, items, max_pending):
+            # A listagem avança na thread da varredura; cada item vai ao loop assim que há vaga
+            def submit(item):
+                return asyncio.run_coroutine_threadsafe(
+                    self._stream_item(organizer, func, item, destination_folder), self._loop)
+            return _bounded_results(submit, items, max(1, min(max_pending, self.max_pending)))
+        
+        organizer._map_workers = map_workers
+        organizer._stream_workers = stream_workers
+        return organizer
+    
+    async def organize_folder(self, folder_path, log_callback=None, max_depth=None, full=False):
+        """Versão assíncrona de FileOrganizer.organize_folder
+        
+        A listagem, o diário e a detecção de duplicados seguem o fluxo síncrono (em
+        uma thread à parte); cada arquivo é organizado no executor limitado.
+        """
+        organizer = self._derive(os.path.abspath(folder_path))
+        return await asyncio.to_thread(organizer.organize_folder, folder_path, log_callback, max_depth, full)
+    
+    async def apply_plan(self, plan, log_callback=None):
+        """Versão assíncrona de FileOrganizer.apply_plan"""
+        organizer = self._derive(plan.folder)
+        return await asyncio.to_thread(organizer.apply_plan, plan, log_callback)
+
+class StabilityQueue:
+    """Fila de arquivos recém-chegados aguardando ficarem estáveis para serem organizados
+    
+    Os eventos apenas registram o arquivo. Uma thread própria verifica tamanho e mtime
+    periodicamente; quando ambos ficam inalterados por quiet_period segundos o arquivo
+    é considerado completo e enviado, em lotes, para um pool de workers. Uma mesma fila
+    pode atender vários FileWatcher; cada arquivo é organizado pelo watcher que o registrou.
+    """
+    
+    def __init__(self, quiet_period=1.0, batch_size=100, workers=1, metrics=None):
+        self.quiet_period = quiet_period
+        self.metrics = metrics or Metrics()
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self._pending = {}
+        self._stats = {}
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._stopping = Event()
+        self._thread = None
+        self._pool = None
+    
+    @classmethod
+    def from_config(cls, config, metrics=None):
+        """Cria a fila com as opções de monitoramento da configuração"""
+        return cls(quiet_period=float(config.get("watch_quiet_period", 1.0)),
+                   batch_size=int(config.get("watch_batch_size", 100)),
+                   workers=int(config.get("workers", 1)),
+                   metrics=metrics)
+    
+    def start(self):
+        """Inicia a thread de estabilização e o pool de workers"""
+        self._stopping.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.metrics.register_gauge("watch_queue_depth", self.pending_count)
+    
+    def stop(self):
+        """Para a fila, aguardando os lotes em andamento"""
+        self._stopping.set()
+        self._wakeup.set()
+        self.metrics.unregister_gauge("watch_queue_depth")
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+    
+    def add(self, file_path, watcher):
+        """Registra (ou renova) um arquivo; nunca bloqueia a thread do observer"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(file_path)
+            first_seen = entry[4] if entry else now
+            # Tamanho/mtime None forçam a primeira leitura na thread de estabilização
+            self._pending[file_path] = [None, None, now, watcher, first_seen]
+        self._wakeup.set()
+    
+    def discard(self, file_path):
+        """Remove um arquivo que foi apagado ou movido antes de estabilizar"""
+        with self._lock:
+            self._pending.pop(file_path, None)
+    
+    def pending_count(self):
+        """Quantidade de arquivos aguardando estabilizar"""
+        with self._lock:
+            return len(self._pending)
+    
+    def stats(self):
+        """Profundidade da fila e latência (evento → arquivo organizado) por pasta monitorada"""
+        with self._lock:
+            result = {}
+            for watcher, counters in self._stats.items():
+                result[watcher.folder_path] = dict(counters, pending=0)
+            for _, _, _, watcher, _ in self._pending.values():
+                root = result.setdefault(watcher.folder_path, {
+                    "organized": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0, "pending": 0})
+                root["pending"] += 1
+        for root in result.values():
+            done = root["organized"] + root["errors"]
+            root["latency_avg"] = root["latency_total"] / done if done else 0.0
+        return result
+    
+    def _run(self):
+        poll_interval = max(0.05, self.quiet_period / 2)
+        while not self._stopping.is_set():
+            if not self.pending_count():
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            self._stopping.wait(poll_interval)
+            started = self.metrics.start()
+            ready = self._collect_stable()
+            self.metrics.lap("watch_stabilize", started)
+            for start in range(0, len(ready), self.batch_size):
+                self._pool.submit(self._organize_batch, ready[start:start + self.batch_size])
+    
+    def _collect_stable(self):
+        """Retorna os arquivos cujo tamanho e mtime não mudam há quiet_period segundos"""
+        with self._lock:
+            snapshot = list(self._pending.items())
+        
+        now = time.monotonic()
+        ready = []
+        changed = {}
+        gone = []
+        for file_path, (size, mtime, last_change, watcher, first_seen) in snapshot:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                gone.append(file_path)
+                continue
+            current = (stat_result.st_size, stat_result.st_mtime_ns)
+            if current != (size, mtime):
+                changed[file_path] = current
+            elif now - last_change >= self.quiet_period:
+                ready.append((file_path, watcher, stat_result, first_seen))
+        
+        with self._lock:
+            for file_path in gone:
+                self._pending.pop(file_path, None)
+            for file_path, (size, mtime) in changed.items():
+                entry = self._pending.get(file_path)
+                if entry is not None:
+                    entry[0], entry[1], entry[2] = size, mtime, now
+            for file_path, *_ in ready:
+                self._pending.pop(file_path, None)
+        return ready
+    
+    def _organize_batch(self, batch):
+        # Watchers com AsyncFileOrganizer recebem o lote de uma vez, sobrepondo as operações
+        submitted = [watcher.async_organizer and watcher.submit(file_path, stat_result)
+                     for file_path, watcher, stat_result, _ in batch]
+        for (file_path, watcher, stat_result, first_seen), future in zip(batch, submitted):
+            success, _ = future.result() if future else watcher.organize(file_path, stat_result)
+            latency = time.monotonic() - first_seen
+            self.metrics.observe("watch_latency", latency)
+            with self._lock:
+                counters = self._stats.setdefault(watcher, {
+                    "organized": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0})
+                counters["organized" if success else "errors"] += 1
+                counters["latency_total"] += latency
+                counters["latency_max"] = max(counters["latency_max"], latency)
+
+class FileWatcher:
+    """Handler para monitoramento de arquivos em tempo real
+    
+    Segue a interface de FileSystemEventHandler do watchdog (dispatch + on_*),
+    sem depender dele na importação do módulo.
+    """
+    
+    def __init__(self, organizer, folder_path, log_callback=None, queue=None, destination_folder=None,
+                 async_organizer=None):
+        self.organizer = organizer
+        self.async_organizer = async_organizer
+        self.folder_path = os.path.abspath(folder_path)
+        self.destination_folder = os.path.abspath(destination_folder or folder_path)
         self.log_callback = log_callback
+        self._owns_queue = queue is None
+        self.queue = queue if queue is not None else StabilityQueue.from_config(organizer.config, organizer.metrics)
+        self.run_id = None
+    
+    def start(self):
+        """Inicia a fila de estabilização, se pertencer a este watcher, e abre a execução no diário"""
+        journal = self.organizer.get_journal()
+        if journal:
+            self.organizer.recover_interrupted(self.folder_path, self.log_callback)
+            self.run_id, _ = journal.begin_run(self.folder_path, "watch")
+        if self._owns_queue:
+            self.queue.start()
+    
+    def stop(self):
+        """Para a fila de estabilização, se pertencer a este watcher, e fecha a execução"""
+        if self._owns_queue:
+            self.queue.stop()
+        journal = self.organizer.get_journal()
+        if journal and self.run_id is not None:
+            journal.finish_run(self.run_id)
+            self.run_id = None
+    
+    def organize(self, file_path, stat_result=None):
+        """Organiza um arquivo estável desta pasta (chamado pela fila)"""
+        return self.organizer.organize_file(file_path, self.destination_folder, self.log_callback,
+                                            stat_result, self.run_id)
+    
+    def submit(self, file_path, stat_result=None):
+        """Envia um arquivo estável ao AsyncFileOrganizer; retorna um Future"""
+        return self.async_organizer.submit(file_path, self.destination_folder, self.log_callback,
+                                           stat_result, self.run_id, organizer=self.organizer)
+    
+    def dispatch(self, event):
+        """Encaminha o evento do watchdog para o método on_<tipo> correspondente"""
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler:
+            handler(event)
+    
+    def catch_up(self):
+        """Enfileira os arquivos que chegaram enquanto o monitoramento estava parado
         
+        Usa o índice de varreduras: só arquivos novos ou alterados desde a última
+        varredura da pasta entram na fila.
+        """
+        index = self.organizer.get_scan_index()
+        if index is None:
+            return 0
+        ignore_hidden = self.organizer.config.get("ignore_hidden", True)
+        count = 0
+        for entry in self.organizer.scan_folder(
+                self.folder_path, 0, IncrementalScan(index, fingerprint=self.organizer.scan_fingerprint())):
+            if ignore_hidden and entry.name.startswith('.'):
+                continue
+            self.queue.add(entry.path, self)
+            count += 1
+        if count and self.log_callback:
+            self.log_callback(f"🔁 {count} arquivos pendentes em {self.folder_path} desde a última execução")
+        return count
+    
+    def _is_watched(self, path):
+        # Apenas arquivos no nível superior; as subpastas são as de destino
+        return os.path.dirname(os.path.abspath(path)) == self.folder_path
+    
+    def _enqueue(self, path):
+        if self._is_watched(path):
+            self.queue.add(path, self)
+    
     def on_created(self, event):
         if not event.is_directory:
-            # Pequeno delay para garantir que o arquivo foi completamente copiado
-            time.sleep(1)
-            if os.path.exists(event.src_path):
-                self.organizer.organize_file(event.src_path, self.folder_path, self.log_callback)
+            self._enqueue(event.src_path)
+    
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._enqueue(event.src_path)
+    
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.queue.discard(event.src_path)
+            self._enqueue(event.dest_path)
+    
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.queue.discard(event.src_path)
+
+class FolderMonitor:
+    """Monitora várias pastas com um único observer e um único pool de workers
+    
+    Cada pasta pode ser um caminho ou um dicionário com "path", "destination"
+    (padrão: a própria pasta) e "rules" (regras que sobrepõem as globais).
+    """
+    
+    def __init__(self, organizer, log_callback=None):
+        self.organizer = organizer
+        self.log_callback = log_callback
+        self.queue = None
+        self.observer = None
+        self.watchers = []
+    
+    @staticmethod
+    def normalize_root(root):
+        """Converte uma entrada de watched_folders em {"path", "destination", "rules"}"""
+        if isinstance(root, str):
+            root = {"path": root}
+        path = os.path.abspath(os.path.expanduser(root["path"]))
+        destination = root.get("destination") or path
+        return {"path": path, "destination": os.path.abspath(os.path.expanduser(destination)),
+                "rules": root.get("rules") or {}}
+    
+    def start(self, roots=None):
+        """Inicia o monitoramento das pastas (padrão: watched_folders da configuração)"""
+        if roots is None:
+            roots = self.organizer.config.get("watched_folders", [])
+        roots = [self.normalize_root(root) for root in roots]
+        # Cada pasta é monitorada uma única vez, mesmo se listada de novo
+        roots = list({root["path"]: root for root in roots}.values())
+        if not roots:
+            raise ValueError("Nenhuma pasta para monitorar")
+        
+        self.queue = StabilityQueue.from_config(self.organizer.config, self.organizer.metrics)
+        self.queue.start()
+        self.observer = new_observer()
+        async_organizer = self.organizer.get_async() if self.organizer.config.get("async_io", False) else None
+        try:
+            for root in roots:
+                organizer = self.organizer
+                if root["rules"]:
+                    organizer = organizer.derive(rules=dict(organizer.config["rules"], **root["rules"]))
+                watcher = FileWatcher(organizer, root["path"], self.log_callback, self.queue, root["destination"],
+                                      async_organizer)
+                watcher.start()
+                self.watchers.append(watcher)
+                self.observer.schedule(watcher, root["path"], recursive=False)
+                if self.log_callback:
+                    self.log_callback(f"👁️ Monitoramento iniciado em: {root['path']}")
+            self.observer.start()
+            # Depois do observer: nada que chegue agora escapa entre a listagem e os eventos
+            for watcher in self.watchers:
+                watcher.catch_up()
+        except BaseException:
+            self.stop()
+            raise
+    
+    def stop(self):
+        """Para o observer, a fila compartilhada e fecha as execuções no diário"""
+        if self.observer:
+            if self.observer.is_alive():
+                self.observer.stop()
+                self.observer.join()
+            self.observer = None
+        if self.queue:
+            self.queue.stop()
+        for watcher in self.watchers:
+            watcher.stop()
+        self.watchers = []
+    
+    def stats(self):
+        """Profundidade da fila e latência por pasta monitorada"""
+        return self.queue.stats() if self.queue else {}
 
 class OrganizerGUI:
-    def __init__(self):
-        self.organizer = FileOrganizer()
+    def __init__(self, organizer=None):
+        _load_tkinter()
+        self.organizer = organizer or FileOrganizer()
+        # log() pode ser chamado de qualquer thread: as mensagens passam por uma fila
+        # que o loop do Tk esvazia periodicamente, e o log completo vai para um arquivo
+        self._log_queue = queue.SimpleQueue()
+        self._log_file = tempfile.NamedTemporaryFile(
+            'w+', encoding='utf-8', prefix="organizer_log_", suffix=".txt", delete=False)
         self.setup_gui()
         
     def setup_gui(self):
@@ -241,6 +2852,8 @@ class OrganizerGUI:
         if WATCHDOG_AVAILABLE:
             self.monitor_btn.pack(side=tk.LEFT, padx=(0,5))
         
+        ttk.Button(button_frame, text="↩️ Desfazer Última", command=self.undo_last_run).pack(side=tk.LEFT, padx=(0,5))
+        
         ttk.Button(button_frame, text="⚙️ Configurações", command=self.show_config).pack(side=tk.LEFT, padx=(0,5))
         
         # Log
@@ -261,14 +2874,22 @@ class OrganizerGUI:
         ttk.Button(log_btn_frame, text="🗑️ Limpar Log", command=self.clear_log).pack(side=tk.LEFT, padx=(0,5))
         ttk.Button(log_btn_frame, text="💾 Salvar Log", command=self.save_log).pack(side=tk.LEFT)
         
-        # Status bar
+        # Status bar (à direita, as métricas ao vivo quando ativadas)
+        status_frame = ttk.Frame(main_frame, relief=tk.SUNKEN)
+        status_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10,0))
+        status_frame.columnconfigure(0, weight=1)
         self.status_var = tk.StringVar(value="Pronto para organizar")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10,0))
+        ttk.Label(status_frame, textvariable=self.status_var, anchor=tk.W).grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.metrics_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.metrics_var, anchor=tk.E).grid(row=0, column=1, sticky=tk.E)
+        self._metrics_due = 0.0
         
         # Configurações de redimensionamento
         main_frame.rowconfigure(4, weight=1)
         
+        # Esvaziamento periódico da fila de log
+        self.root.after(self.organizer.config.get("log_flush_ms", 100), self._drain_log)
+        
         # Log inicial
         self.log("🚀 Organizador de Arquivos iniciado!")
         self.log("💡 Dica: Selecione uma pasta e clique em 'Organizar Agora'")
@@ -278,11 +2899,47 @@ class OrganizerGUI:
             self.log("   Para instalar: pip install watchdog")
     
     def log(self, message):
-        """Adiciona mensagem ao log"""
+        """Adiciona mensagem ao log (seguro para chamar de qualquer thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self._log_queue.put(f"[{timestamp}] {message}\n")
+    
+    def _drain_log(self):
+        """Insere de uma vez as mensagens pendentes, mantendo só as últimas linhas no widget"""
+        try:
+            lines = []
+            while True:
+                try:
+                    lines.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            if lines:
+                text = "".join(lines)
+                self._log_file.write(text)
+                self._log_file.flush()
+                
+                self.log_text.insert(tk.END, text)
+                max_lines = self.organizer.config.get("log_max_lines", 2000)
+                # Toda mensagem termina em \n, então a última linha do widget está vazia
+                line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+                if line_count > max_lines:
+                    self.log_text.delete("1.0", f"{line_count - max_lines + 1}.0")
+                self.log_text.see(tk.END)
+            self._update_metrics()
+        finally:
+            self.root.after(self.organizer.config.get("log_flush_ms", 100), self._drain_log)
+    
+    def _update_metrics(self):
+        """Atualiza as métricas da barra de status no máximo uma vez por segundo"""
+        metrics = self.organizer.metrics
+        if not metrics.enabled:
+            if self.metrics_var.get():
+                self.metrics_var.set("")
+            return
+        now = time.monotonic()
+        if now >= self._metrics_due:
+            self._metrics_due = now + 1.0
+            self.metrics_var.set(metrics.status_line())
     
     def select_folder(self):
         """Abre diálogo para seleção de pasta"""
@@ -308,7 +2965,11 @@ class OrganizerGUI:
         # Executa organização em thread separada
         def organize_thread():
             try:
-                success, message = self.organizer.organize_folder(folder, self.log)
+                if self.organizer.config.get("async_io", False):
+                    async_organizer = self.organizer.get_async()
+                    success, message = async_organizer.run(async_organizer.organize_folder(folder, self.log))
+                else:
+                    success, message = self.organizer.organize_folder(folder, self.log)
                 self.root.after(0, lambda: self.status_var.set("Organização concluída!"))
                 if success:
                     self.root.after(0, lambda: messagebox.showinfo("Sucesso", "Organização concluída!"))
@@ -318,43 +2979,77 @@ class OrganizerGUI:
         
         Thread(target=organize_thread, daemon=True).start()
     
+    def undo_last_run(self):
+        """Desfaz a última organização registrada no diário"""
+        if not self.organizer.config.get("journal_enabled", True):
+            messagebox.showwarning("Aviso", "O diário de movimentações está desativado!")
+            return
+        if not messagebox.askyesno("Confirmar", "Desfazer a última organização?"):
+            return
+        
+        self.status_var.set("Desfazendo...")
+        self.log("=" * 50)
+        
+        def undo_thread():
+            try:
+                success, message = self.organizer.undo_last_run(self.log)
+                self.root.after(0, lambda: self.status_var.set(message if not success else "Organização desfeita!"))
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao desfazer: {e}"))
+                self.root.after(0, lambda: self.status_var.set("Erro ao desfazer"))
+        
+        Thread(target=undo_thread, daemon=True).start()
+    
     def toggle_monitoring(self):
         """Inicia/para o monitoramento em tempo real"""
         if not WATCHDOG_AVAILABLE:
             messagebox.showerror("Erro", "Watchdog não está instalado!")
             return
             
+        # Monitora a pasta selecionada junto com as de "watched_folders"
+        roots = list(self.organizer.config.get("watched_folders", []))
         folder = self.folder_var.get().strip()
-        if not folder:
+        if folder:
+            roots.insert(0, folder)
+        if not roots and not self.organizer.monitoring:
             messagebox.showwarning("Aviso", "Selecione uma pasta primeiro!")
             return
         
         if not self.organizer.monitoring:
             # Inicia monitoramento
             try:
-                event_handler = FileWatcher(self.organizer, folder, self.log)
-                self.organizer.observer = Observer()
-                self.organizer.observer.schedule(event_handler, folder, recursive=False)
-                self.organizer.observer.start()
+                monitor = FolderMonitor(self.organizer, self.log)
+                monitor.start(roots)
+                self.organizer.monitor = monitor
                 self.organizer.monitoring = True
                 
                 self.monitor_btn.config(text="⏸️ Parar Monitoramento")
-                self.status_var.set(f"Monitorando: {folder}")
-                self.log(f"👁️ Monitoramento iniciado em: {folder}")
+                if len(monitor.watchers) == 1:
+                    self.status_var.set(f"Monitorando: {monitor.watchers[0].folder_path}")
+                else:
+                    self.status_var.set(f"Monitorando {len(monitor.watchers)} pastas")
                 
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao iniciar monitoramento: {e}")
         else:
             # Para monitoramento
-            if self.organizer.observer:
-                self.organizer.observer.stop()
-                self.organizer.observer.join()
+            self.stop_monitoring()
             
             self.organizer.monitoring = False
             self.monitor_btn.config(text="👁️ Iniciar Monitoramento")
             self.status_var.set("Monitoramento parado")
             self.log("⏸️ Monitoramento parado")
     
+    def stop_monitoring(self):
+        """Para o observer e a fila compartilhada, registrando as estatísticas por pasta"""
+        if self.organizer.monitor:
+            for folder, stats in self.organizer.monitor.stats().items():
+                self.log(f"📈 {folder}: {stats['organized']} organizados, {stats['errors']} erros, "
+                         f"latência média {stats['latency_avg']:.2f}s (máx. {stats['latency_max']:.2f}s)")
+            self.organizer.monitor.stop()
+            self.organizer.monitor = None
+            self.organizer.write_metrics()
+    
     def show_config(self):
         """Mostra janela de configurações"""
         ConfigWindow(self.organizer, self.log)
@@ -362,6 +3057,8 @@ class OrganizerGUI:
     def clear_log(self):
         """Limpa o log"""
         self.log_text.delete(1.0, tk.END)
+        self._log_file.seek(0)
+        self._log_file.truncate()
         self.log("🗑️ Log limpo")
     
     def save_log(self):
@@ -372,19 +3069,23 @@ class OrganizerGUI:
                 filetypes=[("Arquivos de texto", "*.txt"), ("Todos os arquivos", "*.*")]
             )
             if filename:
-                content = self.log_text.get(1.0, tk.END)
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                # O widget só guarda as últimas linhas; o log completo está no arquivo
+                self._log_file.flush()
+                shutil.copyfile(self._log_file.name, filename)
                 self.log(f"💾 Log salvo em: {filename}")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar log: {e}")
     
     def on_closing(self):
         """Handler para fechamento da aplicação"""
-        if self.organizer.monitoring and self.organizer.observer:
-            self.organizer.observer.stop()
-            self.organizer.observer.join()
+        if self.organizer.monitoring:
+            self.stop_monitoring()
         self.root.destroy()
+        self._log_file.close()
+        try:
+            os.remove(self._log_file.name)
+        except OSError:
+            pass
     
     def run(self):
         """Executa a aplicação"""
@@ -461,6 +3162,37 @@ class ConfigWindow:
         ttk.Checkbutton(parent, text="👁️ Ignorar arquivos ocultos (que começam com .)", 
                        variable=self.hidden_var).pack(anchor=tk.W, padx=10, pady=5)
         
+        # Identificação pelo conteúdo
+        self.sniff_var = tk.BooleanVar(value=self.organizer.config.get("content_sniffing", False))
+        ttk.Checkbutton(parent, text="🔍 Identificar arquivos sem extensão conhecida pelo conteúdo", 
+                       variable=self.sniff_var).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # E/S assíncrona
+        self.async_var = tk.BooleanVar(value=self.organizer.config.get("async_io", False))
+        ttk.Checkbutton(parent, text="🌐 E/S assíncrona (pastas de rede com alta latência)", 
+                       variable=self.async_var).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # Métricas de desempenho
+        self.metrics_var = tk.BooleanVar(value=self.organizer.config.get("metrics_enabled", False))
+        ttk.Checkbutton(parent, text="📈 Coletar métricas de desempenho (barra de status e metrics_file)", 
+                       variable=self.metrics_var).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # Arquivos duplicados
+        ttk.Label(parent, text="♻️ Arquivos duplicados (mesmo conteúdo):").pack(anchor=tk.W, padx=10, pady=(10,0))
+        self.dedup_var = tk.StringVar(value=self.organizer.config.get("dedup_action", "off"))
+        ttk.Combobox(parent, textvariable=self.dedup_var, values=["off", "skip", "hardlink", "quarantine"],
+                     state="readonly", width=12).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # Workers paralelos
+        ttk.Label(parent, text="⚡ Workers paralelos (1 = sequencial):").pack(anchor=tk.W, padx=10, pady=(10,0))
+        self.workers_var = tk.IntVar(value=self.organizer.config.get("workers", 1))
+        ttk.Spinbox(parent, from_=1, to=64, textvariable=self.workers_var, width=5).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # Profundidade de subpastas
+        ttk.Label(parent, text="📂 Profundidade de subpastas (0 = apenas a pasta selecionada):").pack(anchor=tk.W, padx=10, pady=(10,0))
+        self.depth_var = tk.IntVar(value=self.organizer.config.get("recursive_depth", 0))
+        ttk.Spinbox(parent, from_=0, to=32, textvariable=self.depth_var, width=5).pack(anchor=tk.W, padx=10, pady=5)
+        
         ttk.Label(parent, text="\n📝 Formatos de data disponíveis:", font=("Arial", 9, "bold")).pack(anchor=tk.W, padx=10)
         ttk.Label(parent, text="%Y-%m = 2025-08 (ano-mês)", font=("Arial", 8)).pack(anchor=tk.W, padx=20)
         ttk.Label(parent, text="%Y-%m-%d = 2025-08-24 (ano-mês-dia)", font=("Arial", 8)).pack(anchor=tk.W, padx=20)
@@ -472,12 +3204,22 @@ class ConfigWindow:
             # Salva regras
             rules_content = self.rules_text.get(1.0, tk.END).strip()
             new_rules = json.loads(rules_content)
+            # Compila antes de aplicar: uma regra inválida não altera nada
+            self.organizer.rebuild_rule_index(new_rules)
             self.organizer.config["rules"] = new_rules
             
             # Salva opções
             self.organizer.config["organize_by_date"] = self.date_var.get()
             self.organizer.config["date_format"] = self.date_format_var.get()
             self.organizer.config["ignore_hidden"] = self.hidden_var.get()
+            self.organizer.config["content_sniffing"] = self.sniff_var.get()
+            self.organizer.config["dedup_action"] = self.dedup_var.get()
+            self.organizer.config["metrics_enabled"] = self.metrics_var.get()
+            self.organizer.config["async_io"] = self.async_var.get()
+            self.organizer.metrics.enabled = self.metrics_var.get()
+            self.organizer.config["workers"] = max(1, self.workers_var.get())
+            self.organizer.config["recursive_depth"] = max(0, self.depth_var.get())
+            self.organizer.rebuild_rule_index()
             
             # Salva arquivo
             self.organizer.save_config()
@@ -495,18 +3237,188 @@ class ConfigWindow:
         """Reseta configurações para o padrão"""
         if messagebox.askyesno("Confirmar", "Resetar todas as configurações?"):
             self.organizer.config = self.organizer.default_config.copy()
+            self.organizer.rebuild_rule_index()
+            self.organizer.metrics.enabled = self.organizer.config["metrics_enabled"]
             self.organizer.save_config()
             self.log_callback("🔄 Configurações resetadas para o padrão")
             messagebox.showinfo("Sucesso", "Configurações resetadas!")
             self.window.destroy()
 
-def main():
+class JsonLogger:
+    """log_callback para o modo linha de comando: uma linha JSON por mensagem"""
+    
+    def __init__(self, command, stream=None):
+        self.command = command
+        self.stream = stream or sys.stdout
+        self._lock = Lock()
+    
+    def emit(self, event, **fields):
+        """Escreve um evento estruturado"""
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"),
+                  "command": self.command, "event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+    
+    def __call__(self, message):
+        self.emit("log", message=message)
+
+def build_parser():
+    """Cria o parser da linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Organizador Automático de Arquivos (sem argumentos abre a interface gráfica)")
+    parser.add_argument("--config", default="organizer_config.json",
+                        help="arquivo de configuração (padrão: organizer_config.json)")
+    parser.add_argument("--workers", type=int, help="workers paralelos (sobrepõe a configuração)")
+    parser.add_argument("--async-io", action="store_true",
+                        help="organiza pelo núcleo assíncrono (pastas de rede com alta latência)")
+    parser.add_argument("--metrics", metavar="arquivo",
+                        help="ativa as métricas e grava o snapshot (.json ou texto do Prometheus)")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    subparsers.add_parser("gui", help="abre a interface gráfica")
+    
+    organize_parser = subparsers.add_parser("organize", help="organiza as pastas uma vez e sai")
+    organize_parser.add_argument("folders", nargs="+", metavar="pasta")
+    organize_parser.add_argument("--depth", type=int, help="profundidade de subpastas (0 = apenas a pasta)")
+    organize_parser.add_argument("--full", action="store_true",
+                                 help="ignora o índice de varreduras e reavalia todos os arquivos")
+    
+    watch_parser = subparsers.add_parser(
+        "watch", help="monitora as pastas até ser interrompido (padrão: watched_folders da configuração)")
+    watch_parser.add_argument("folders", nargs="*", metavar="pasta")
+    watch_parser.add_argument("--quiet-period", type=float,
+                              help="segundos sem mudanças para considerar um arquivo completo")
+    watch_parser.add_argument("--stats-interval", type=float, default=0,
+                              help="emite profundidade da fila, latência por pasta e métricas a cada N segundos")
+    
+    plan_parser = subparsers.add_parser("plan", help="calcula o plano de organização sem mover nada")
+    plan_parser.add_argument("folder", metavar="pasta")
+    plan_parser.add_argument("--depth", type=int, help="profundidade de subpastas (0 = apenas a pasta)")
+    plan_parser.add_argument("--output", help="exporta o plano completo (.json ou .csv)")
+    
+    apply_parser = subparsers.add_parser("apply", help="executa um plano exportado em JSON")
+    apply_parser.add_argument("plan_file", metavar="plano.json")
+    
+    subparsers.add_parser("undo", help="desfaz a última organização registrada no diário")
+    return parser
+
+def run_cli(args):
+    """Executa um comando sem interface gráfica; retorna o código de saída"""
+    organizer = FileOrganizer(args.config)
+    if args.workers is not None:
+        organizer.config["workers"] = max(1, args.workers)
+    if args.metrics:
+        organizer.config["metrics_file"] = args.metrics
+        organizer.metrics.enabled = True
+    if args.async_io:
+        organizer.config["async_io"] = True
+    async_organizer = organizer.get_async() if organizer.config.get("async_io", False) else None
+    logger = JsonLogger(args.command)
+    
+    if args.command == "organize":
+        exit_code = 0
+        for folder in args.folders:
+            if async_organizer:
+                success, message = async_organizer.run(
+                    async_organizer.organize_folder(folder, logger, args.depth, args.full))
+            else:
+                success, message = organizer.organize_folder(folder, logger, args.depth, args.full)
+            logger.emit("result", folder=folder, success=success, message=message)
+            if not success:
+                exit_code = 1
+        return exit_code
+    
+    if args.command == "plan":
+        if not os.path.isdir(args.folder):
+            logger.emit("result", folder=args.folder, success=False, message="Pasta não encontrada")
+            return 1
+        start = time.perf_counter()
+        plan = organizer.plan_folder(args.folder, args.depth)
+        elapsed = time.perf_counter() - start
+        if args.output:
+            if args.output.lower().endswith(".csv"):
+                plan.to_csv(args.output)
+            else:
+                plan.to_json(args.output)
+        logger.emit("result", folder=plan.folder, success=True, files=len(plan),
+                    seconds=round(elapsed, 3), summary=plan.summary(), output=args.output)
+        return 0
+    
+    if args.command == "apply":
+        plan = MovePlan.from_json(args.plan_file)
+        if async_organizer:
+            success, message = async_organizer.run(async_organizer.apply_plan(plan, logger))
+        else:
+            success, message = organizer.apply_plan(plan, logger)
+        logger.emit("result", folder=plan.folder, success=success, message=message)
+        return 0 if success else 1
+    
+    if args.command == "undo":
+        success, message = organizer.undo_last_run(logger)
+        logger.emit("result", success=success, message=message)
+        return 0 if success else 1
+    
+    if args.command == "watch":
+        if not WATCHDOG_AVAILABLE:
+            logger.emit("result", success=False, message="Watchdog não está instalado!")
+            return 1
+        if args.quiet_period is not None:
+            organizer.config["watch_quiet_period"] = args.quiet_period
+        
+        stopping = Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        
+        monitor = FolderMonitor(organizer, logger)
+        try:
+            monitor.start(args.folders or None)
+        except ValueError as e:
+            logger.emit("result", success=False, message=str(e))
+            return 1
+        organizer.monitor = monitor
+        organizer.monitoring = True
+        try:
+            interval = args.stats_interval or 1
+            while not stopping.wait(interval):
+                if args.stats_interval:
+                    logger.emit("stats", folders=monitor.stats())
+                    organizer.write_metrics()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.emit("stats", folders=monitor.stats())
+            monitor.stop()
+            organizer.write_metrics()
+            organizer.monitor = None
+            organizer.monitoring = False
+            logger("⏸️ Monitoramento parado")
+        return 0
+    
+    return 2
+
+def main(argv=None):
     """Função principal"""
+    args = build_parser().parse_args(argv)
+    if args.command not in (None, "gui"):
+        return run_cli(args)
+    
     try:
-        app = OrganizerGUI()
+        organizer = FileOrganizer(args.config)
+        if args.workers is not None:
+            organizer.config["workers"] = max(1, args.workers)
+        if args.metrics:
+            organizer.config["metrics_file"] = args.metrics
+            organizer.metrics.enabled = True
+        if args.async_io:
+            organizer.config["async_io"] = True
+        app = OrganizerGUI(organizer)
         app.run()
     except Exception as e:
         print(f"Erro ao iniciar aplicação: {e}")
+        return 1
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())